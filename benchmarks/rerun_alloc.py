@@ -0,0 +1,91 @@
+"""
+重新執行 (rerun) 的記憶體配置與耗時基準測試 (GEMINI.md V20.13)。
+
+以合成的催員每日指標表 (預設 10 組 × 40 人 × 365 天) 比較單組「取一日 + 取一個月」的篩選：
+- original：V20.13 之前的作法，先以 Group == 組別 篩出整組並 .copy()，日期與月份再各以布林遮罩篩選並 .copy()
+- group_views：目前儀表板的 GroupViews.slice_date / slice_month (iloc 唯讀切片)
+
+記憶體尖峰以 tracemalloc 量測；耗時另外量測 (不開 tracemalloc，避免追蹤本身拉長時間)。
+GroupViews 直接取自儀表板原始碼，不另外複製一份實作。
+
+用法：python benchmarks/rerun_alloc.py [--dashboard dashboard_cloud.py] [--groups 10] [--agents 40] [--days 365] [--repeat 20]
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --- 載入儀表板模組：不經 streamlit run 執行時，streamlit 以 bare mode 執行頂層程式碼，main() 不會被呼叫 ---
+def load_dashboard(path):
+    namespace = {'__name__': 'dashboard', '__file__': path}
+    with open(path, encoding='utf-8') as f:
+        exec(compile(f.read(), path, 'exec'), namespace)
+    return namespace
+
+# --- 合成指標表：欄位與型別與 ETL 產出的 agent_day_cube 相同 ---
+def make_cube(n_groups, n_agents, n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    groups = [f"G{i}" for i in range(n_groups)]
+    days = pd.date_range('2025-01-01', periods=n_days)
+    rows = [(day, group, f"{group}-{agent}", f"name{group}{agent}") for day in days for group in groups for agent in range(n_agents)]
+    cube = pd.DataFrame(rows, columns=['Date', 'Group', 'Agent ID', 'Agent Name'])
+    for column in ['Total_Outbound_Call', 'Total_Outbound_Call_Success', 'Total_Case_call', 'Total_Success_Case', 'Cases_on_Hand']:
+        cube[column] = rng.integers(0, 200, len(cube))
+    cube['Daily_Received_Amount'] = rng.random(len(cube)) * 1e4
+    cube['Total_Talk_Duration'] = pd.to_timedelta(rng.integers(0, 20000, len(cube)), unit='s')
+    cube['Group'] = cube['Group'].astype('category')
+    return cube, groups, days
+
+def measure(fn, repeat):
+    """回傳 (記憶體尖峰 MB, 每次耗時 ms)；先執行一次暖機。"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    for _ in range(repeat):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, elapsed * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description="比較視圖篩選在每次重新執行時的記憶體配置與耗時")
+    parser.add_argument('--dashboard', default='dashboard_local.py', help="要量測的儀表板檔案 (相對於專案根目錄)")
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--agents', type=int, default=40)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    dashboard = load_dashboard(os.path.join(REPO_DIR, args.dashboard))
+    cube, groups, days = make_cube(args.groups, args.agents, args.days)
+    cube = dashboard['sort_by_calendar'](cube)
+    views = dashboard['GroupViews'](cube)
+
+    group = groups[len(groups) // 2]
+    day = days[len(days) // 2]
+    date, month = day.date(), day.to_period('M')
+
+    def original():
+        df = cube[cube['Group'] == group].copy()
+        df_daily = df[df['Date'].dt.date == date].copy()
+        df_month = df[df['Date'].dt.to_period('M') == month].copy()
+        return df_daily, df_month
+
+    def group_views():
+        return views.slice_date(group, date), views.slice_month(group, month)
+
+    print(f"指標表 {len(cube):,} 列，{cube.memory_usage(deep=True).sum() / 1e6:.1f} MB；組別 {group}，日期 {date}，月份 {month}")
+    for name, fn in [('original', original), ('group_views', group_views)]:
+        peak_mb, elapsed_ms = measure(fn, args.repeat)
+        print(f"{name:12s} 記憶體尖峰 {peak_mb:8.2f} MB  耗時 {elapsed_ms:8.2f} ms/次")
+
+if __name__ == "__main__":
+    main()
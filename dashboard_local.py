@@ -5,6 +5,15 @@ import altair as alt
 import os
 import io
 import json
+import glob
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # --- 【V18.2 升級】優化覆蓋率分析視圖，實現動態適應座標軸 ---
 LANGUAGES = {
@@ -20,6 +29,18 @@ LANGUAGES = {
         "data_load_failed": "資料未能成功載入，請根據上方的錯誤訊息檢查您的設定。",
         "sidebar_view_mode": "選擇檢視模式",
         "sidebar_filter_team": "篩選團隊",
+        "sidebar_data_time": "資料時間：{time}",
+        "sidebar_data_version": "資料版本：{version}",
+        "sidebar_refresh_status_current": "已是最新版本 (上次檢查：{time})",
+        "sidebar_refresh_status_pending": "背景更新中：正在載入新版本 {version}，完成後再操作頁面即會顯示新資料。",
+        "sidebar_refresh_status_failed": "新版本 {version} 載入失敗，仍顯示目前的資料；將於下次檢查時重試。",
+        "sidebar_refresh_data": "立即檢查更新",
+        "sidebar_warmup_time": "預設視圖預熱耗時：{seconds:.2f} 秒",
+        "sidebar_memory_report": "記憶體用量報告",
+        "memory_report_columns": ["欄位", "轉換前 (MB)", "轉換後 (MB)", "節省比例"],
+        "memory_report_total": "合計",
+        "memory_report_empty": "尚未載入通話明細。",
+        "memory_report_partition_cache": "月分區快取：{used:.1f} / {budget} MB",
         "view_modes": ["催員每日撥打狀況報告", "月度催員接通數儀表板", "催員催收行為分析", "催員時點撥打與接通分析", "催員行為與高績效人員比較", "覆蓋率與績效關聯分析"],
         "all_teams": "所有團隊",
         # Daily View
@@ -59,6 +80,9 @@ LANGUAGES = {
         "heatmap_metric_connections": "總接通數",
         "heatmap_metric_total_calls": "總撥打數",
         "heatmap_metric_called_coverage": "撥打案件覆蓋率",
+        "monthly_view_heatmap_render_mode": "顯示方式",
+        "monthly_view_heatmap_render_options": ["表格", "熱力圖"],
+        "monthly_view_heatmap_agent": "催員",
         "monthly_view_jump_header": "快速跳轉至每日報告",
         "monthly_view_jump_agent_label": "選擇催員",
         "monthly_view_jump_date_label": "選擇日期",
@@ -89,7 +113,7 @@ LANGUAGES = {
         "behavior_view_y_axis_conversion_rate": "回收轉換率 (產出)",
         "behavior_view_tooltip_category": "時長區間",
         "behavior_view_tooltip_count": "通話筆數",
-        "behavior_view_tooltip_recovered_cases": "回收案件數",
+        "behavior_view_tooltip_recovered_calls": "回收日通話數",
         "behavior_view_tooltip_conversion_rate": "回收轉換率",
         "behavior_view_tooltip_percentage": "通話比例",
         "behavior_view_data_subheader": "詳細數據",
@@ -177,6 +201,18 @@ LANGUAGES = {
         "data_load_failed": "Failed to load data. Please check your settings based on the error message above.",
         "sidebar_view_mode": "Select View Mode",
         "sidebar_filter_team": "Filter Team",
+        "sidebar_data_time": "Data time: {time}",
+        "sidebar_data_version": "Data version: {version}",
+        "sidebar_refresh_status_current": "Up to date (last checked: {time})",
+        "sidebar_refresh_status_pending": "Refreshing in the background: loading version {version}. New data appears on your next interaction once it is ready.",
+        "sidebar_refresh_status_failed": "Failed to load version {version}; still showing the current data. Will retry on the next check.",
+        "sidebar_refresh_data": "Check for updates",
+        "sidebar_warmup_time": "Default views warmed up in {seconds:.2f}s",
+        "sidebar_memory_report": "Memory Usage Report",
+        "memory_report_columns": ["Column", "Before (MB)", "After (MB)", "Saved"],
+        "memory_report_total": "Total",
+        "memory_report_empty": "No call data loaded yet.",
+        "memory_report_partition_cache": "Month partition cache: {used:.1f} / {budget} MB",
         "view_modes": ["Daily Agent Report", "Monthly Dashboard", "Behavior Analysis", "Call Time Analysis", "Agent Profiling", "Coverage & Performance Analysis"],
         "all_teams": "All Teams",
         # Daily View
@@ -216,6 +252,9 @@ LANGUAGES = {
         "heatmap_metric_connections": "Total Connections",
         "heatmap_metric_total_calls": "Total Calls",
         "heatmap_metric_called_coverage": "Called Coverage",
+        "monthly_view_heatmap_render_mode": "Display As",
+        "monthly_view_heatmap_render_options": ["Table", "Heatmap Chart"],
+        "monthly_view_heatmap_agent": "Agent",
         "monthly_view_jump_header": "Quick Access to Daily Report",
         "monthly_view_jump_agent_label": "Select Agent",
         "monthly_view_jump_date_label": "Select Date",
@@ -246,7 +285,7 @@ LANGUAGES = {
         "behavior_view_y_axis_conversion_rate": "Recovery Conversion Rate (Output)",
         "behavior_view_tooltip_category": "Duration Category",
         "behavior_view_tooltip_count": "Call Count",
-        "behavior_view_tooltip_recovered_cases": "Recovered Cases",
+        "behavior_view_tooltip_recovered_calls": "Calls on Recovery Days",
         "behavior_view_tooltip_conversion_rate": "Conversion Rate",
         "behavior_view_tooltip_percentage": "Call Percentage",
         "behavior_view_data_subheader": "Detailed Data",
@@ -330,7 +369,8 @@ if 'lang' not in st.session_state:
 
 # --- 語言文本獲取函數 ---
 def get_text(key):
-    return LANGUAGES[st.session_state.lang].get(key, key)
+    # 背景更新執行緒沒有工作階段，使用預設語言
+    return LANGUAGES[st.session_state.get('lang', 'zh_tw')].get(key, key)
 
 # --- 頁面配置 ---
 st.set_page_config(
@@ -345,31 +385,641 @@ CUSTOM_GROUP_ORDER = [
     "SR Team", "Vehicle M1", "Motor M2", "Vehicle M2", "M3", "Write off"
 ]
 
+# --- 催員每日指標表 (ETL 預先彙總) ---
+AGENT_DAY_CUBE_FILENAME = "agent_day_cube.parquet"
+AGENT_DAY_KEYS = ['Date', 'Group', 'Agent ID', 'Agent Name']
+# --- 催員每日 KPI 維度表 (在手案件數、當日回收金額不再重複存於每筆通話) ---
+AGENT_DAY_KPI_FILENAME = "agent_day_kpi.parquet"
+AGENT_DAY_KPI_KEYS = ['Date', 'Agent ID']
+AGENT_DAY_KPI_COLUMNS = ['Cases on Hand', 'Daily Received Amount']
+# --- 催員每分鐘撥打直方圖 (ETL 預先彙總)：每位催員每日、一天中第幾分鐘的撥打數、接通數與回收金額，只存有撥打的分鐘 ---
+AGENT_MINUTE_HISTOGRAM_FILENAME = "agent_minute_histogram.parquet"
+MINUTE_HISTOGRAM_COLUMNS = ['Minute', 'Calls', 'Connected_Calls', 'Received_Amount']
+MINUTES_PER_DAY = 24 * 60
+MINUTE_OF_DAY_LABELS = np.array([f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(MINUTES_PER_DAY)], dtype=object)
+# 時點分析的時段粒度 (分鐘)；任何粒度都由每分鐘統計相鄰加總而得
+TIME_GRANULARITY_MINUTES = {"小時": 60, "30分鐘": 30, "15分鐘": 15}
+
+# --- 通話明細月分區 (calls_YYYY-MM.parquet 或 calls_YYYY-MM__組別.parquet)，按需載入 ---
+PARTITION_NAME_PATTERN = re.compile(r"^calls_(\d{4}-\d{2})(?:__.+)?\.parquet$")
+PARTITION_CACHE_BUDGET_MB = 512
+
+# --- 背景更新：每隔 REFRESH_POLL_SECONDS 秒檢查一次資料來源，新版本在背景建好後才切換；資料時間與檢查時間以 DISPLAY_TIMEZONE 顯示 ---
+REFRESH_POLL_SECONDS = 60
+DISPLAY_TIMEZONE = None  # 伺服器本地時間
+# --- 啟動預熱：背景執行緒在每個資料版本載入後 (切換前) 預先計算的預設視圖，設為空 tuple 即停用 ---
+# "daily"：所有團隊最新日期的每日報告；"monthly_heatmap"：各組最新月份的月度趨勢與熱圖；"coverage"：各組最新月份的覆蓋率摘要
+WARMUP_VIEWS = ("daily", "monthly_heatmap", "coverage")
+# 找不到月分區時回傳的空白通話明細：ETL 月分區讀入後的欄位與型別，再經 apply_call_schema 轉為與已載入分區相同的型別
+CALL_COLUMN_DTYPES = {
+    'Date': 'datetime64[us]', 'Group': 'str', 'Agent ID': 'str', 'Agent Name': 'str',
+    'Case No': 'str', 'Connected': 'int8', 'Talk Durations': 'timedelta64[us]', 'Call Assigned': 'datetime64[us]'
+}
+
+# --- 通話明細與 KPI 維度表載入時套用的精簡型別：字串鍵為類別 (整數代碼 + 一份字串字典，不重複案件數直接在代碼上計算)，
+# 通話時長存為整數秒 Talk Seconds；整數欄位有缺值或超出範圍時維持原型別 ---
+CALL_TABLE_SCHEMA = {
+    'Group': 'category', 'Agent ID': 'category', 'Agent Name': 'category', 'Case No': 'category',
+    'Connected': 'int8', 'Talk Seconds': 'int32', 'Cases on Hand': 'uint16', 'Daily Received Amount': 'float32'
+}
+
+# --- 視圖彙總快取：依 (資料版本, 組別, 催員, 期間, 粒度) 記憶彙總結果，只切換顯示選項時不重算 ---
+VIEW_CACHE_MAX_ENTRIES = 64
+
+# --- 通話時長區間：上界 (秒，含) 與標籤只在此定義一次，最後一個區間沒有上限 ---
+TALK_DURATION_BIN_EDGES = [5, 10, 30, 60, 120, 180]
+TALK_DURATION_CATEGORIES = ["~5s", "5s - 10s", "10s - 30s", "30s - 1min", "1min - 2min", "2min - 3min", "> 3min"]
+# --- 催員通話時長直方圖 (ETL 預先彙總)：Talk_Seconds 為每格上界秒數，超過上限的通話歸入溢位格；區間上界須為解析度的倍數且不超過上限 ---
+AGENT_TALK_HISTOGRAM_FILENAME = "agent_talk_histogram.parquet"
+TALK_HISTOGRAM_RESOLUTION_SECONDS = 1
+TALK_HISTOGRAM_MAX_SECONDS = 600
+
+# --- 啟動快照：載入並轉好型別的資料表存成 Arrow IPC 檔 (依資料版本命名)，下次冷啟動以 memory map 讀回，不再解析 CSV 或合併分區；資料表的型別或欄位改變時遞增 SNAPSHOT_FORMAT_VERSION ---
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".snapshot_cache")
+SNAPSHOT_FORMAT_VERSION = 1
+
 # --- 輔助函數 ---
-def format_timedelta(td):
-    if pd.isnull(td) or not isinstance(td, pd.Timedelta):
-        return "00:00:00"
-    total_seconds = int(td.total_seconds())
-    hours, remainder = divmod(total_seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+def format_durations(durations):
+    """整欄 timedelta 一次轉為 HH:MM:SS 字串 (缺值為 00:00:00)，取代逐格呼叫的格式化函數。"""
+    total_seconds = durations.dt.total_seconds().fillna(0).astype('int64')
+    hours, remainder = np.divmod(total_seconds, 3600)
+    minutes, seconds = np.divmod(remainder, 60)
+    return hours.astype(str).str.zfill(2) + ':' + minutes.astype(str).str.zfill(2) + ':' + seconds.astype(str).str.zfill(2)
+
+def threshold_values(groups, thresholds, key):
+    """依各列的組別查出績效上下限設定 (key 為 '下限'、'上限' 或 '總撥打數下限')；未設定的組別為 NaN。"""
+    limits = {group: values.get(key) for group, values in (thresholds or {}).items()}
+    return pd.to_numeric(groups.astype(str).map(limits), errors='coerce')
+
+def apply_call_schema(df, table_name=None):
+    """依 CALL_TABLE_SCHEMA 將剛載入的資料表轉為精簡型別 (就地修改並回傳)，並將轉換前後各欄位的記憶體用量記入記憶體報告 (table_name 為 None 時不記錄)。"""
+    before = df.memory_usage(deep=True, index=False).rename({'Talk Durations': 'Talk Seconds'})
+    if 'Talk Durations' in df.columns:
+        df['Talk Seconds'] = df.pop('Talk Durations').dt.total_seconds().fillna(0).round()
+    for col, dtype in CALL_TABLE_SCHEMA.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype != 'category' and np.issubdtype(np.dtype(dtype), np.integer):
+            limits = np.iinfo(dtype)
+            if df[col].isna().any() or df[col].min() < limits.min or df[col].max() > limits.max:
+                continue
+        df[col] = df[col].astype(dtype)
+    if table_name is not None:
+        get_memory_reports()[table_name] = pd.DataFrame({'before': before, 'after': df.memory_usage(deep=True, index=False)})
+    return df
+
+def memory_report_table(report):
+    """記憶體報告轉為顯示用表格：各欄位轉換前後的 MB 與節省比例，最後一列為合計。"""
+    report = report.fillna(0)
+    report.loc[get_text("memory_report_total")] = report.sum()
+    saved = np.where(report['before'] > 0, 1 - report['after'] / report['before'], 0)
+    table = pd.DataFrame({'before': report['before'] / 1024 ** 2, 'after': report['after'] / 1024 ** 2, 'saved': saved}, index=report.index)
+    table.columns = get_text("memory_report_columns")[1:]
+    return table.rename_axis(get_text("memory_report_columns")[0]).reset_index()
+
+def key_codes(values):
+    """欄位的整數代碼：類別欄位直接取其代碼，其餘以 pd.factorize 編碼；缺值為 -1。"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype('int64')
+    return pd.factorize(values)[0].astype('int64')
+
+def distinct_count(codes):
+    """整數代碼的不重複數 (點陣標記)：缺值 (-1) 不計。"""
+    codes = codes[codes >= 0]
+    if len(codes) == 0:
+        return 0
+    seen = np.zeros(int(codes.max()) + 1, dtype=bool)
+    seen[codes] = True
+    return int(seen.sum())
+
+def grouped_distinct_count(group_ids, codes, n_groups):
+    """各組內不重複代碼數：將 (組別編號, 代碼) 合成單一 int64 鍵，排序後只留每段相同鍵的第一筆，再依組別計數；組別編號或代碼為 -1 的列不計。"""
+    valid = (group_ids >= 0) & (codes >= 0)
+    width = int(codes[valid].max()) + 1 if valid.any() else 1
+    pairs = np.sort(group_ids[valid] * width + codes[valid])
+    first_seen = np.concatenate(([True], pairs[1:] != pairs[:-1])) if len(pairs) else np.zeros(0, dtype=bool)
+    return np.bincount(pairs[first_seen] // width, minlength=n_groups)
+
+def join_agent_day_kpi(df, kpi):
+    """將 KPI 維度表併回通話明細 (僅供需要逐通話歸屬金額的視圖)；明細已含這些欄位時 (舊版 CSV) 原樣回傳。"""
+    if kpi is None or all(col in df.columns for col in AGENT_DAY_KPI_COLUMNS):
+        return df
+    df = pd.merge(df.astype({'Agent ID': str}), kpi.astype({'Agent ID': str}), on=AGENT_DAY_KPI_KEYS, how='left')
+    df[AGENT_DAY_KPI_COLUMNS] = df[AGENT_DAY_KPI_COLUMNS].fillna(0)
+    return df
+
+def bucket_talk_histogram(histogram, columns=('Calls',), edges=TALK_DURATION_BIN_EDGES, labels=TALK_DURATION_CATEGORIES):
+    """將通話時長直方圖依區間上界 edges (秒，含) 加總成各區間的計數；依區間順序列出所有區間，Category 為有序類別。"""
+    codes = np.searchsorted(edges, histogram['Talk_Seconds'].to_numpy(), side='left')
+    buckets = pd.DataFrame({'Category': pd.Categorical(labels, categories=labels, ordered=True)})
+    for col in columns:
+        buckets[col] = np.bincount(codes, weights=histogram[col].to_numpy(), minlength=len(labels)).astype('int64')
+    return buckets
+
+def empty_calls():
+    return apply_call_schema(pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in CALL_COLUMN_DTYPES.items()}))
+
+class PartitionLRUCache:
+    """以總記憶體為上限的 LRU 快取；超過上限時淘汰最久未使用的分區，但至少保留最近載入的一個。"""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = loader()
+        with self._lock:
+            self._items[key] = value
+            self._sizes[key] = int(value.memory_usage(deep=True).sum())
+            self._items.move_to_end(key)
+            while len(self._items) > 1 and sum(self._sizes.values()) > self.budget_bytes:
+                evicted_key, _ = self._items.popitem(last=False)
+                del self._sizes[evicted_key]
+        return value
+
+    def used_bytes(self):
+        with self._lock:
+            return sum(self._sizes.values())
+
+@st.cache_resource
+def get_partition_cache():
+    return PartitionLRUCache(PARTITION_CACHE_BUDGET_MB * 1024 * 1024)
+
+# --- 記憶體報告：各資料表載入時套用精簡型別前後的每欄位用量 (bytes)，依資料表名稱保存最近一次的結果 ---
+@st.cache_resource
+def get_memory_reports():
+    return {}
+
+# --- 日曆索引：資料載入時依 (Date, Group, Agent ID) 排序，日期與月份的篩選改為連續列範圍切片 ---
+CALENDAR_SORT_KEYS = ['Date', 'Group', 'Agent ID']
+
+def sort_by_calendar(df):
+    return df.sort_values(CALENDAR_SORT_KEYS, kind='stable', ignore_index=True)
+
+def rows_between(df, start, end):
+    """已依日期排序的資料表中，日期落在 [start, end) 的列；以二分搜尋切片，不掃描整欄。"""
+    bounds = np.searchsorted(df['Date'].to_numpy(), [pd.Timestamp(start).to_datetime64(), pd.Timestamp(end).to_datetime64()])
+    return df.iloc[bounds[0]:bounds[1]]
+
+class CalendarIndex:
+    """已依日期排序之資料表的日曆索引：每個日期與月份對應一段連續列範圍，並預先整理可用的日期 (新到舊) 與月份 (舊到新)。"""
+
+    def __init__(self, df):
+        dates = df['Date'].to_numpy()
+        day_values, day_starts = np.unique(dates, return_index=True)
+        day_stops = np.append(day_starts[1:], len(dates))
+        days = pd.DatetimeIndex(day_values)
+        self.date_ranges = {day.date(): (int(start), int(stop)) for day, start, stop in zip(days, day_starts, day_stops)}
+        self.month_ranges = {}
+        for month, start, stop in zip(days.to_period('M'), day_starts, day_stops):
+            self.month_ranges[month] = (self.month_ranges.get(month, (int(start),))[0], int(stop))
+        self.dates = sorted(self.date_ranges, reverse=True)
+        self.months = sorted(self.month_ranges)
+
+    def slice_date(self, df, date):
+        start, stop = self.date_ranges.get(date, (0, 0))
+        return df.iloc[start:stop]
+
+    def slice_month(self, df, month):
+        start, stop = self.month_ranges.get(month, (0, 0))
+        return df.iloc[start:stop]
+
+class GroupViews:
+    """
+    依組別分割的唯讀視圖層，每個資料版本只建立一次：各組別的催員每日指標表各自存成一段依日期排序的連續資料，並附日曆索引。
+    視圖取得的都是 iloc 切片 (不複製)，只能讀取；暫存欄位請在最後篩出的小切片上另建。group 為 None 代表所有團隊。
+    """
+
+    def __init__(self, cube, version=None):
+        self.version = version
+        self.frames = {None: cube}
+        for group, positions in cube.groupby('Group', observed=True, sort=False).indices.items():
+            self.frames[str(group)] = cube.take(positions).reset_index(drop=True)
+        self.calendars = {group: CalendarIndex(frame) for group, frame in self.frames.items()}
+
+    def frame(self, group=None):
+        return self.frames[group] if group in self.frames else self.frames[None].iloc[0:0]
+
+    def dates(self, group=None):
+        return self.calendars[group].dates if group in self.calendars else []
+
+    def months(self, group=None):
+        return self.calendars[group].months if group in self.calendars else []
+
+    def slice_date(self, group, date):
+        return self.calendars[group].slice_date(self.frames[group], date) if group in self.calendars else self.frame(group)
+
+    def slice_month(self, group, month):
+        return self.calendars[group].slice_month(self.frames[group], month) if group in self.calendars else self.frame(group)
+
+def group_key(selected_group):
+    """側邊欄的組別選項轉為日曆索引的組別鍵 (所有團隊為 None)。"""
+    return None if selected_group == get_text("all_teams") else selected_group
+
+def select_calls(df_calls, group=None, agent_names=None, date=None):
+    """從單月通話明細 (已依日期排序) 篩選日期、組別 (None 為所有團隊) 與催員 (皆可省略)，不影響共用的月分區。"""
+    if date is not None:
+        df_calls = rows_between(df_calls, date, pd.Timestamp(date) + pd.Timedelta(days=1))
+    mask = None
+    if group is not None:
+        mask = df_calls['Group'] == group
+    if agent_names is not None:
+        agent_mask = df_calls['Agent Name'].isin(agent_names)
+        mask = agent_mask if mask is None else mask & agent_mask
+    # 沒有組別與催員條件時直接回傳切片，不複製整個月份
+    return df_calls if mask is None else df_calls[mask]
+
+def build_agent_day_cube(df, kpi=None):
+    """將通話明細彙總為每位催員每日一列的指標表 (與 ETL 產出的 agent_day_cube 相同)。"""
+    if kpi is None:
+        # 舊版 CSV 的每筆通話都帶有當日 KPI，取每位催員每日的第一筆即可還原維度表
+        kpi = df.groupby(AGENT_DAY_KPI_KEYS, observed=True)[AGENT_DAY_KPI_COLUMNS].first().reset_index()
+    df = df.assign(Connected=df['Connected'].astype('int64'))
+    grouped = df.groupby(AGENT_DAY_KEYS, observed=True)
+    cube = grouped.agg(
+        Total_Outbound_Call=('Connected', 'size'),
+        Total_Outbound_Call_Success=('Connected', 'sum'),
+        Total_Talk_Duration=('Talk Seconds', 'sum')
+    ).reset_index()
+    cube['Total_Talk_Duration'] = pd.to_timedelta(cube['Total_Talk_Duration'], unit='s')
+    # 處理案件數與成功 (接通) 案件數在 Case No 的整數代碼上計算
+    group_ids = grouped.ngroup().fillna(-1).to_numpy().astype('int64')
+    case_codes = key_codes(df['Case No'])
+    cube['Total_Case_call'] = grouped_distinct_count(group_ids, case_codes, len(cube))
+    cube['Total_Success_Case'] = grouped_distinct_count(group_ids, np.where(df['Connected'].to_numpy() == 1, case_codes, -1), len(cube))
+    cube = cube[AGENT_DAY_KEYS + ['Total_Outbound_Call', 'Total_Outbound_Call_Success', 'Total_Case_call', 'Total_Success_Case', 'Total_Talk_Duration']]
+    # 精簡型別只用於儲存，指標表的 KPI 欄位維持與 ETL 輸出相同的 int64 / float64
+    kpi = kpi.astype({'Cases on Hand': 'int64', 'Daily Received Amount': 'float64'})
+    kpi = kpi.rename(columns={'Cases on Hand': 'Cases_on_Hand', 'Daily Received Amount': 'Daily_Received_Amount'})
+    cube = pd.merge(cube.astype({'Agent ID': str}), kpi.astype({'Agent ID': str}), on=AGENT_DAY_KPI_KEYS, how='left')
+    cube[['Cases_on_Hand', 'Daily_Received_Amount']] = cube[['Cases_on_Hand', 'Daily_Received_Amount']].fillna(0)
+    return cube
+
+def build_agent_minute_histogram(df, kpi=None):
+    """將通話明細彙總為每位催員每日每分鐘一列的撥打直方圖 (與 ETL 產出的 agent_minute_histogram 相同)。"""
+    df = join_agent_day_kpi(df.loc[df['Call Assigned'].notna()], kpi)
+    df = df.assign(
+        Minute=(df['Call Assigned'].dt.hour * 60 + df['Call Assigned'].dt.minute).astype('int16'),
+        Connected=df['Connected'].astype('int64'),
+        Received_Amount=df['Daily Received Amount'].astype('float64')
+    )
+    histogram = df.groupby(AGENT_DAY_KEYS + ['Minute'], observed=True).agg(
+        Calls=('Connected', 'size'),
+        Connected_Calls=('Connected', 'sum'),
+        Received_Amount=('Received_Amount', 'sum')
+    ).reset_index()
+    return histogram.astype({'Calls': 'int32', 'Connected_Calls': 'int32'})
+
+def build_agent_talk_histogram(df, kpi=None):
+    """將通話明細彙總為每位催員每日每個時長格一列的通話時長直方圖 (與 ETL 產出的 agent_talk_histogram 相同)。"""
+    df = join_agent_day_kpi(df.loc[df['Talk Seconds'] > 0], kpi)
+    bins = np.ceil(df['Talk Seconds'] / TALK_HISTOGRAM_RESOLUTION_SECONDS)
+    overflow_bin = TALK_HISTOGRAM_MAX_SECONDS // TALK_HISTOGRAM_RESOLUTION_SECONDS + 1
+    df = df.assign(
+        Talk_Seconds=(np.minimum(bins, overflow_bin) * TALK_HISTOGRAM_RESOLUTION_SECONDS).astype('int16'),
+        Recovered=(df['Daily Received Amount'] > 0).astype('int64')
+    )
+    histogram = df.groupby(AGENT_DAY_KEYS + ['Talk_Seconds'], observed=True).agg(
+        Calls=('Recovered', 'size'),
+        Recovered_Calls=('Recovered', 'sum')
+    ).reset_index()
+    return histogram.astype({'Calls': 'int32', 'Recovered_Calls': 'int32'})
+
+# --- 資料集版本：以資料檔的名稱、大小與修改時間判斷 ETL 是否已產出新資料 (由背景更新執行緒定期檢查) ---
+def dataset_files(file_path):
+    if os.path.isdir(file_path):
+        return sorted(glob.glob(os.path.join(file_path, "*.parquet")))
+    return [file_path] if os.path.exists(file_path) else []
+
+def dataset_version(file_path):
+    paths = dataset_files(file_path)
+    stats = [(os.path.basename(p), os.path.getsize(p), os.path.getmtime(p)) for p in paths]
+    return hashlib.sha256(repr(stats).encode('utf-8')).hexdigest()[:12]
+
+def dataset_modified_time(file_path):
+    """資料檔中最新的修改時間 (資料時間)；找不到資料檔時為 None。"""
+    paths = dataset_files(file_path)
+    return pd.Timestamp.fromtimestamp(max(os.path.getmtime(p) for p in paths)) if paths else None
+
+# --- 啟動快照的讀寫 ---
+def snapshot_path(name, version):
+    return os.path.join(SNAPSHOT_DIR, f"{name}__{version}__v{SNAPSHOT_FORMAT_VERSION}.arrow")
+
+def load_snapshot(name, version):
+    """以 memory map 讀回快照並還原其記憶體報告；沒有快照或檔案損毀時回傳 None。"""
+    try:
+        with pa.memory_map(snapshot_path(name, version), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+            df = table.to_pandas()
+    except (OSError, pa.ArrowException):
+        return None
+    metadata = table.schema.metadata or {}
+    if b'memory_report' in metadata:
+        get_memory_reports()[name] = pd.DataFrame(json.loads(metadata[b'memory_report']))
+    return df
+
+def save_snapshot(df, name, version):
+    """將資料表 (連同記憶體報告) 寫成未壓縮的 Arrow IPC 檔，並刪除同名的舊版本快照；寫入失敗 (例如唯讀磁碟) 不影響本次讀取。"""
+    path = snapshot_path(name, version)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        report = get_memory_reports().get(name)
+        if report is not None:
+            table = table.replace_schema_metadata({**table.schema.metadata, b'memory_report': json.dumps(report.to_dict())})
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        with pa.OSFile(f"{path}.tmp", 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(f"{path}.tmp", path)
+        for filename in os.listdir(SNAPSHOT_DIR):
+            if filename.startswith(f"{name}__") and filename != os.path.basename(path):
+                os.remove(os.path.join(SNAPSHOT_DIR, filename))
+    except (OSError, pa.ArrowException):
+        pass
+
+def load_or_build_snapshot(name, version, build):
+    """先讀取快照；沒有時呼叫 build() 建立資料表並寫入快照。build() 回傳 None (載入失敗) 時不寫入。"""
+    df = load_snapshot(name, version)
+    if df is None:
+        df = build()
+        if df is not None:
+            save_snapshot(df, name, version)
+    return df
 
 # --- 從本地端檔案路徑載入數據 ---
-@st.cache_data
-def load_data(file_path):
-    try:
+# 以 st.cache_resource 在行程內只保留一份資料，所有工作階段共用同一個物件 (不再每次重新執行都反序列化複本)；
+# 視圖只能篩選或另建新欄位的副本，不可就地修改傳入的 DataFrame。各載入函數保留兩個版本：使用中的版本與背景更新正在建立的新版本。
+# 載入函數由背景更新執行緒呼叫，那裡沒有可顯示訊息的執行環境：失敗時直接拋出例外，成功或失敗的訊息由 main() 依 DatasetRefresher 的狀態顯示。
+@st.cache_resource(max_entries=2)
+def load_data(file_path, version):
+    df = load_snapshot("calls", version)
+    if df is not None:
+        return df
+    if os.path.isdir(file_path):
+        # ETL 輸出的月分區 Parquet 資料集，欄位已是原生型別，無需再從文字解析
+        partition_paths = sorted(glob.glob(os.path.join(file_path, "calls_*.parquet")))
+        if not partition_paths:
+            raise FileNotFoundError(file_path)
+        df = pa.concat_tables([pq.read_table(p) for p in partition_paths]).to_pandas()
+    else:
         df = pd.read_csv(file_path)
         df['Date'] = pd.to_datetime(df['Date'])
         df['Talk Durations'] = pd.to_timedelta(df['Talk Durations'].fillna('00:00:00'), errors='coerce')
         df['Call Assigned'] = pd.to_datetime(df['Call Assigned'])
-        st.success(get_text("load_data_local_success").format(path=file_path))
-        return df
-    except FileNotFoundError:
-        st.error(get_text("load_data_local_error_not_found").format(path=file_path))
+        df['Group'] = df['Group'].astype(str)
+    df = sort_by_calendar(apply_call_schema(df, "calls"))
+    save_snapshot(df, "calls", version)
+    return df
+
+# --- 載入催員每日 KPI 維度表；舊版 CSV 的 KPI 欄位已在通話明細內，回傳 None ---
+@st.cache_resource(max_entries=2)
+def load_agent_day_kpi(file_path, version):
+    kpi_path = os.path.join(file_path, AGENT_DAY_KPI_FILENAME)
+    if os.path.isdir(file_path) and os.path.exists(kpi_path):
+        return apply_call_schema(pd.read_parquet(kpi_path), "agent_day_kpi")
+    return None
+
+# --- 載入催員每日指標表；舊版 CSV 或尚未產出指標表時，由通話明細即時彙總 ---
+@st.cache_resource(max_entries=2)
+def load_agent_day_cube(file_path, version):
+    def build():
+        cube_path = os.path.join(file_path, AGENT_DAY_CUBE_FILENAME)
+        if os.path.isdir(file_path) and os.path.exists(cube_path):
+            cube = pd.read_parquet(cube_path)
+        else:
+            df = load_data(file_path, version)
+            cube = build_agent_day_cube(df, load_agent_day_kpi(file_path, version)) if df is not None else None
+        return sort_by_calendar(cube) if cube is not None else None
+    return load_or_build_snapshot("agent_day_cube", version, build)
+
+# --- 依組別分割的催員每日指標表與日曆索引，每個資料版本只建立一次 ---
+@st.cache_resource(max_entries=2)
+def load_group_views(file_path, version):
+    cube = load_agent_day_cube(file_path, version)
+    return GroupViews(cube, version) if cube is not None else None
+
+# --- 載入催員每分鐘撥打直方圖；舊版 CSV 或尚未產出直方圖時，由通話明細即時彙總 ---
+@st.cache_resource(max_entries=2)
+def load_agent_minute_histogram(file_path, version):
+    def build():
+        histogram_path = os.path.join(file_path, AGENT_MINUTE_HISTOGRAM_FILENAME)
+        if os.path.isdir(file_path) and os.path.exists(histogram_path):
+            histogram = pd.read_parquet(histogram_path)
+        else:
+            df = load_data(file_path, version)
+            histogram = build_agent_minute_histogram(df, load_agent_day_kpi(file_path, version)) if df is not None else None
+        return sort_by_calendar(histogram) if histogram is not None else None
+    return load_or_build_snapshot("agent_minute_histogram", version, build)
+
+# --- 依組別分割的每分鐘撥打直方圖與日曆索引，供時點分析依 (組別, 日期/月份) 直接切片 ---
+@st.cache_resource(max_entries=2)
+def load_minute_views(file_path, version):
+    histogram = load_agent_minute_histogram(file_path, version)
+    return GroupViews(histogram, version) if histogram is not None else None
+
+# --- 載入催員通話時長直方圖；舊版 CSV 或尚未產出直方圖時，由通話明細即時彙總 ---
+@st.cache_resource(max_entries=2)
+def load_agent_talk_histogram(file_path, version):
+    def build():
+        histogram_path = os.path.join(file_path, AGENT_TALK_HISTOGRAM_FILENAME)
+        if os.path.isdir(file_path) and os.path.exists(histogram_path):
+            histogram = pd.read_parquet(histogram_path)
+        else:
+            df = load_data(file_path, version)
+            histogram = build_agent_talk_histogram(df, load_agent_day_kpi(file_path, version)) if df is not None else None
+        return sort_by_calendar(histogram) if histogram is not None else None
+    return load_or_build_snapshot("agent_talk_histogram", version, build)
+
+# --- 依組別分割的通話時長直方圖與日曆索引，供行為分析與個人剖析依 (組別, 日期/月份) 直接切片 ---
+@st.cache_resource(max_entries=2)
+def load_talk_views(file_path, version):
+    histogram = load_agent_talk_histogram(file_path, version)
+    return GroupViews(histogram, version) if histogram is not None else None
+
+# --- 月份索引：列出資料夾內各月份的分區檔；舊版 CSV 沒有分區時回傳 None ---
+def list_month_partitions(file_path):
+    if not os.path.isdir(file_path):
         return None
+    index = {}
+    for path in sorted(glob.glob(os.path.join(file_path, "calls_*.parquet"))):
+        match = PARTITION_NAME_PATTERN.match(os.path.basename(path))
+        if match:
+            index.setdefault(match.group(1), []).append(path)
+    return index
+
+# --- 載入單一月份 (pd.Period) 的通話明細；月分區經由 LRU 快取共用，舊版 CSV 由整份資料篩選 ---
+def load_month_calls(file_path, version, month):
+    index = list_month_partitions(file_path)
+    if index is None:
+        df = load_data(file_path, version)
+        return rows_between(df, month.start_time, (month + 1).start_time) if df is not None else empty_calls()
+    paths = index.get(month.strftime('%Y-%m'))
+    if not paths:
+        return empty_calls()
+    try:
+        return get_partition_cache().get(
+            (version, month.strftime('%Y-%m')),
+            lambda: sort_by_calendar(apply_call_schema(pa.concat_tables([pq.read_table(p) for p in paths]).to_pandas(), f"calls_{month.strftime('%Y-%m')}"))
+        )
     except Exception as e:
         st.error(get_text("load_data_local_error_generic").format(e=e))
-        return None
+        return empty_calls()
+
+# --- 背景更新：資料來源的版本檢查、新版本的建立與切換都在背景執行緒完成，工作階段只讀取使用中的版本 ---
+class DatasetRefresher:
+    """
+    背景更新執行緒：每隔 interval_seconds 秒以 check_version() 檢查資料來源，發現新版本時在請求路徑之外以 build(version) 建好共用資料表、
+    以 warm_up(version) 預先計算預設視圖，完成後才切換使用中的版本，工作階段不會等待重新載入。
+    最近一次載入失敗的例外保存在 error，由工作階段顯示 (背景執行緒無法顯示訊息)。
+    舊版本保留一個檢查週期給仍在執行中的工作階段，之後以 release(version) 釋放。
+    """
+
+    def __init__(self, check_version, modified_time, build, warm_up, release, interval_seconds):
+        self.check_version = check_version
+        self.modified_time = modified_time
+        self.build = build
+        self.warm_up = warm_up
+        self.release = release
+        self.interval_seconds = interval_seconds
+        self.version = None
+        self.loaded = False
+        self.data_time = None
+        self.checked_at = None
+        self.pending_version = None
+        self.failed_version = None
+        self.error = None
+        self.warmup_seconds = None
+        self._retired_version = None
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def current_version(self):
+        """使用中的資料版本；行程啟動後的第一次呼叫在本次請求內載入資料並啟動背景執行緒，之後不再阻塞。"""
+        with self._start_lock:
+            if self._thread is None:
+                self.check()
+                self._thread = threading.Thread(target=self._run, name="dataset-refresher", daemon=True)
+                self._thread.start()
+        return self.version
+
+    def warm(self, version):
+        """預先計算指定版本的預設視圖並記錄耗時 (秒)；預熱失敗不影響版本切換，使用者開啟視圖時再計算。"""
+        started = time.perf_counter()
+        try:
+            self.warm_up(version)
+        except Exception:
+            return
+        self.warmup_seconds = time.perf_counter() - started
+
+    def request_check(self):
+        """請背景執行緒立即檢查一次，不等待結果。"""
+        self._wake.set()
+
+    def check(self):
+        """檢查一次資料來源：版本改變 (或該版本先前載入失敗) 時建立該版本，成功後 (或第一次載入時) 才切換。"""
+        if self._retired_version is not None:
+            self.release(self._retired_version)
+            self._retired_version = None
+        version = self.check_version()
+        self.checked_at = pd.Timestamp.now(tz=DISPLAY_TIMEZONE)
+        # 無法確認來源版本 ("unknown"，例如 Drive 查詢暫時失敗) 時維持目前的版本；第一次載入仍照常進行以顯示實際的錯誤
+        if (version == self.version and self.loaded) or (version == "unknown" and self.version is not None):
+            self.failed_version, self.error = None, None
+            return
+        if version in (self.version, self.failed_version):
+            # 快取中保存的是上次失敗的結果 (None)，先清除再重試
+            self.release(version)
+        self.pending_version = version
+        error = None
+        try:
+            loaded = self.build(version)
+            if loaded and self.version is not None:
+                self.warm(version)
+        except Exception as e:
+            # 檔案可能尚未寫完或已損毀，視為載入失敗；保留例外供工作階段顯示原因
+            loaded, error = False, e
+        finally:
+            self.pending_version = None
+        self.error = error
+        if loaded or self.version is None:
+            previous = self.version
+            self.version, self.loaded, self.failed_version = version, loaded, None
+            self.data_time = self.modified_time()
+            if previous not in (None, version):
+                self._retired_version = previous
+        else:
+            self.failed_version = version
+
+    def _run(self):
+        # 第一次載入在請求內完成，其預熱改在背景進行，不延後第一位使用者的頁面
+        if self.loaded:
+            self.warm(self.version)
+        while True:
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            try:
+                self.check()
+            except Exception:
+                # 檢查或建立過程的意外錯誤不可中止執行緒；維持目前版本，下次檢查時再試
+                pass
+
+# --- 背景更新：建立與釋放指定版本的共用資料表 ---
+DATASET_LOADERS = (load_data, load_agent_day_kpi, load_agent_day_cube, load_group_views,
+                   load_agent_minute_histogram, load_minute_views, load_agent_talk_histogram, load_talk_views)
+
+def build_dataset_version(file_path, version):
+    """建立指定版本的指標表與各直方圖視圖 (月分區仍按需載入)；指標表載入失敗時回傳 False。"""
+    if load_group_views(file_path, version) is None:
+        return False
+    load_minute_views(file_path, version)
+    load_talk_views(file_path, version)
+    return True
+
+def warm_up_dataset_version(file_path, version):
+    """依 WARMUP_VIEWS 預先計算指定版本的預設視圖彙總 (與視圖使用相同的快取鍵)。"""
+    views = load_group_views(file_path, version)
+    if views is None or not WARMUP_VIEWS:
+        return
+    if "daily" in WARMUP_VIEWS and views.dates():
+        aggregate_daily_summary(views, version, None, views.dates()[0])
+    for group in views.frames:
+        months = views.months(group)
+        if not months:
+            continue
+        if "monthly_heatmap" in WARMUP_VIEWS:
+            aggregate_monthly_trend(views, version, group, months[-1])
+            aggregate_monthly_heatmap(views, version, group, months[-1])
+        if "coverage" in WARMUP_VIEWS:
+            aggregate_coverage_daily(views, version, group, months[-1])
+
+def release_dataset_version(file_path, version):
+    """釋放指定版本的共用資料表快取，其他版本不受影響。"""
+    for loader in DATASET_LOADERS:
+        loader.clear(file_path, version)
+
+@st.cache_resource
+def get_dataset_refresher(file_path):
+    return DatasetRefresher(
+        check_version=partial(dataset_version, file_path),
+        modified_time=partial(dataset_modified_time, file_path),
+        build=partial(build_dataset_version, file_path),
+        warm_up=partial(warm_up_dataset_version, file_path),
+        release=partial(release_dataset_version, file_path),
+        interval_seconds=REFRESH_POLL_SECONDS
+    )
+
+# --- 資料載入失敗的原因：由工作階段依 DatasetRefresher.error 顯示 ---
+def show_load_error(error, file_path, container=st):
+    if isinstance(error, FileNotFoundError):
+        container.error(get_text("load_data_local_error_not_found").format(path=file_path))
+    else:
+        container.error(get_text("load_data_local_error_generic").format(e=error))
 
 # --- 載入績效上下限設定檔 ---
 @st.cache_data
@@ -385,14 +1035,31 @@ def load_thresholds(path):
         st.error(get_text("load_thresholds_error").format(e=e))
         return None
 
-# --- 每日報告視圖 ---
-def display_daily_view(df, selected_group, thresholds):
-    st.header(get_text("daily_view_header"))
+# --- 每日報告的彙總：催員每日一列並計算覆蓋率等衍生指標 (依參數快取，回傳的 DataFrame 可自由修改) ---
+@st.cache_data(max_entries=VIEW_CACHE_MAX_ENTRIES)
+def aggregate_daily_summary(_views, version, group, date):
+    summary = _views.slice_date(group, date)[[
+        'Group', 'Agent ID', 'Agent Name', 'Total_Outbound_Call', 'Total_Outbound_Call_Success',
+        'Total_Case_call', 'Total_Talk_Duration', 'Cases_on_Hand', 'Daily_Received_Amount', 'Total_Success_Case'
+    ]].reset_index(drop=True)
+
+    summary['Repetition_rate'] = np.where(summary['Total_Success_Case'] > 0, summary['Total_Outbound_Call_Success'] / summary['Total_Success_Case'], 0)
+
+    total_seconds = summary['Total_Talk_Duration'].dt.total_seconds()
+    total_cases = summary['Total_Case_call']
+    average_seconds = np.where(total_cases > 0, total_seconds / total_cases, 0)
+    summary['Average_Talk_Duration'] = pd.to_timedelta(average_seconds, unit='s')
 
-    if selected_group != get_text("all_teams"):
-        df = df[df['Group'] == selected_group].copy()
+    summary['Called_Coverage'] = np.where(summary['Cases_on_Hand'] > 0, summary['Total_Case_call'] / summary['Cases_on_Hand'], 0)
+    summary['Connected_Coverage'] = np.where(summary['Cases_on_Hand'] > 0, summary['Total_Success_Case'] / summary['Cases_on_Hand'], 0)
+    return summary
 
-    available_dates = sorted(df['Date'].dt.date.unique(), reverse=True)
+# --- 每日報告視圖 (讀取催員每日指標表) ---
+def display_daily_view(views, selected_group, thresholds):
+    st.header(get_text("daily_view_header"))
+
+    group = group_key(selected_group)
+    available_dates = views.dates(group)
     if not available_dates:
         st.info(get_text("daily_view_no_data_for_team"))
         return
@@ -414,26 +1081,12 @@ def display_daily_view(df, selected_group, thresholds):
     )
 
     if selected_date:
-        df_daily = df[df['Date'].dt.date == selected_date].copy()
+        summary = aggregate_daily_summary(views, views.version, group, selected_date)
 
-        if df_daily.empty:
+        if summary.empty:
             st.info(get_text("daily_view_no_records_for_date").format(selected_date=selected_date))
             return
 
-        summary = df_daily.groupby(['Group', 'Agent ID', 'Agent Name']).agg(
-            Total_Outbound_Call=('Case No', 'size'),
-            Total_Outbound_Call_Success=('Connected', 'sum'),
-            Total_Case_call=('Case No', 'nunique'),
-            Total_Talk_Duration=('Talk Durations', 'sum'),
-            Cases_on_Hand=('Cases on Hand', 'first'),
-            Daily_Received_Amount=('Daily Received Amount', 'first')
-        ).reset_index()
-
-        success_cases = df_daily[df_daily['Connected'] == 1].groupby(['Agent ID'])['Case No'].nunique().reset_index()
-        success_cases.rename(columns={'Case No': 'Total_Success_Case'}, inplace=True)
-        summary = pd.merge(summary, success_cases, on='Agent ID', how='left')
-        summary['Total_Success_Case'] = summary['Total_Success_Case'].fillna(0).astype(int)
-
         preselected_agent = st.session_state.pop('daily_view_preselect_agent', None)
         if preselected_agent:
             summary['__priority'] = np.where(summary['Agent Name'] == preselected_agent, 0, 1)
@@ -443,76 +1096,130 @@ def display_daily_view(df, selected_group, thresholds):
                 date=selected_date.strftime('%Y-%m-%d')
             ))
 
-        summary['Repetition_rate'] = np.where(summary['Total_Success_Case'] > 0, summary['Total_Outbound_Call_Success'] / summary['Total_Success_Case'], 0)
-
-        total_seconds = summary['Total_Talk_Duration'].dt.total_seconds()
-        total_cases = summary['Total_Case_call']
-        average_seconds = np.where(total_cases > 0, total_seconds / total_cases, 0)
-        summary['Average_Talk_Duration'] = pd.to_timedelta(average_seconds, unit='s')
-
-        summary['Called_Coverage'] = np.where(summary['Cases_on_Hand'] > 0, summary['Total_Case_call'] / summary['Cases_on_Hand'], 0)
-        summary['Connected_Coverage'] = np.where(summary['Cases_on_Hand'] > 0, summary['Total_Success_Case'] / summary['Cases_on_Hand'], 0)
+        # 顯示字串與上下限標色都以整欄運算一次完成，欄位名稱每次繪製只查一次
+        column_labels = get_text("daily_view_columns")
+        summary['Total_Talk_Duration'] = format_durations(summary['Total_Talk_Duration'])
+        summary['Average_Talk_Duration'] = format_durations(summary['Average_Talk_Duration'])
 
-        summary_to_style = summary.copy()
+        connections = summary['Total_Outbound_Call_Success']
+        lower_bound = threshold_values(summary['Group'], thresholds, '下限')
+        upper_bound = threshold_values(summary['Group'], thresholds, '上限')
+        below_lower = (connections > 0) & (connections < lower_bound)
+        above_upper = (connections > 0) & ~below_lower & (connections >= upper_bound)
 
-        summary['Total_Talk_Duration'] = summary['Total_Talk_Duration'].apply(format_timedelta)
-        summary['Average_Talk_Duration'] = summary['Average_Talk_Duration'].apply(format_timedelta)
-        summary['Repetition_rate'] = summary['Repetition_rate'].round(3)
-        summary['Daily_Received_Amount'] = summary['Daily_Received_Amount'].map('{:,.0f}'.format)
-        summary['Called_Coverage'] = summary['Called_Coverage'].map('{:.1%}'.format)
-        summary['Connected_Coverage'] = summary['Connected_Coverage'].map('{:.1%}'.format)
-
-        column_map_keys = list(get_text("daily_view_columns").keys())
         original_columns = [
             'Group', 'Agent ID', 'Agent Name', 'Cases_on_Hand', 'Total_Outbound_Call',
             'Total_Case_call', 'Called_Coverage', 'Total_Outbound_Call_Success', 'Total_Success_Case',
             'Connected_Coverage', 'Repetition_rate', 'Total_Talk_Duration',
             'Average_Talk_Duration', 'Daily_Received_Amount'
         ]
-        rename_dict = {orig: get_text("daily_view_columns")[key] for orig, key in zip(original_columns, column_map_keys)}
-        summary.rename(columns=rename_dict, inplace=True)
-        summary_to_style.rename(columns=rename_dict, inplace=True)
-
-        final_columns_order = list(get_text("daily_view_columns").values())
-
-        def style_daily_kpi(row):
-            styles = pd.Series('', index=row.index)
-            group_name = row[get_text("daily_view_columns")['組別']]
+        rename_dict = {orig: column_labels[key] for orig, key in zip(original_columns, column_labels.keys())}
+        summary = summary.rename(columns=rename_dict)[list(column_labels.values())]
 
-            if not thresholds or group_name not in thresholds:
-                return styles
+        styles = pd.DataFrame('', index=summary.index, columns=summary.columns)
+        styles[column_labels['總成功撥打數']] = np.select(
+            [below_lower, above_upper], ['background-color: #FFCDD2', 'background-color: #C8E6C9'], default=''
+        )
 
-            value_to_check = row[get_text("daily_view_columns")['總成功撥打數']]
-
-            lower_bound = thresholds[group_name]['下限']
-            upper_bound = thresholds[group_name]['上限']
-
-            if value_to_check > 0:
-                if value_to_check < lower_bound:
-                    styles[get_text("daily_view_columns")['總成功撥打數']] = 'background-color: #FFCDD2'
-                elif value_to_check >= upper_bound:
-                    styles[get_text("daily_view_columns")['總成功撥打數']] = 'background-color: #C8E6C9'
-            return styles
-
-        styled_summary = summary_to_style[final_columns_order].style.apply(style_daily_kpi, axis=1).format({
-            get_text("daily_view_columns")['總通話時長']: format_timedelta,
-            get_text("daily_view_columns")['平均通話時長']: format_timedelta,
-            get_text("daily_view_columns")['重複撥打率']: '{:.3f}',
-            get_text("daily_view_columns")['當日回收金額']: '{:,.0f}',
-            get_text("daily_view_columns")['撥打案件覆蓋率']: '{:.1%}',
-            get_text("daily_view_columns")['接通案件覆蓋率']: '{:.1%}'
+        styled_summary = summary.style.apply(lambda _: styles, axis=None).format({
+            column_labels['重複撥打率']: '{:.3f}',
+            column_labels['當日回收金額']: '{:,.0f}',
+            column_labels['撥打案件覆蓋率']: '{:.1%}',
+            column_labels['接通案件覆蓋率']: '{:.1%}'
         })
 
         st.dataframe(styled_summary, use_container_width=True, hide_index=True)
 
-# --- 月度報告視圖 ---
-def display_monthly_view(df, selected_group, thresholds):
-    st.header(get_text("monthly_view_header"))
+# --- 月度趨勢的彙總：全月總計與每日接通數、回收金額 (依參數快取) ---
+@st.cache_data(max_entries=VIEW_CACHE_MAX_ENTRIES)
+def aggregate_monthly_trend(_views, version, group, month):
+    df_month = _views.slice_month(group, month)
+    # 回收金額是催員每日一筆的數值，直接加總即可，不會再因通話筆數而重複計算
+    totals = {
+        'connections': df_month['Total_Outbound_Call_Success'].sum(),
+        'amount': df_month['Daily_Received_Amount'].sum()
+    }
+    daily_summary = df_month.groupby('Date').agg(
+        Total_Connections=('Total_Outbound_Call_Success', 'sum'),
+        Total_Received_Amount=('Daily_Received_Amount', 'sum')
+    ).reset_index()
+    return totals, daily_summary
+
+# --- 月度熱力圖指標：鍵對應顯示名稱 heatmap_metric_<鍵>；compute 由催員每日指標表算出該指標，format 為表格顯示格式 ---
+# 新增指標只需在此宣告，所有指標會在同一次彙總中一併算好
+def called_coverage_measure(df):
+    # --- FIX: Ensure 'Cases on Hand' is numeric before division ---
+    cases_on_hand = pd.to_numeric(df['Cases_on_Hand'], errors='coerce').fillna(0)
+    return pd.Series(np.where(cases_on_hand > 0, df['Total_Case_call'] / cases_on_hand, 0), index=df.index)
+
+HEATMAP_MEASURES = {
+    'connections': {'compute': lambda df: df['Total_Outbound_Call_Success'], 'format': None},
+    'total_calls': {'compute': lambda df: df['Total_Outbound_Call'], 'format': None},
+    'called_coverage': {'compute': called_coverage_measure, 'format': '{:.1%}'},
+}
 
-    if selected_group != get_text("all_teams"):
-        df = df[df['Group'] == selected_group].copy()
+# --- 月度熱力圖的彙總：一次算出所有指標的催員 × 日期寬表，欄位為 (指標, 日期)；每個 (組別, 月份) 只算一次 ---
+@st.cache_data(max_entries=VIEW_CACHE_MAX_ENTRIES)
+def aggregate_monthly_heatmap(_views, version, group, month):
+    df_month = _views.slice_month(group, month)
+    measures = pd.DataFrame({key: measure['compute'](df_month) for key, measure in HEATMAP_MEASURES.items()})
+    measures.index = pd.MultiIndex.from_frame(df_month[AGENT_DAY_KEYS])
+    return measures.unstack(level='Date', fill_value=0)
+
+# --- 月度熱力圖 (圖表模式)：長格式資料與標色狀態，規則與表格模式相同 ---
+HEATMAP_STATUS_COLORS = {'below': '#FFCDD2', 'above': '#C8E6C9', 'weekend': '#FFFDE7', 'normal': '#FFFFFF'}
+
+def heatmap_long_format(pivot, metric_key, thresholds):
+    """
+    將催員 × 日期的樞紐表轉回長格式，並以整欄運算標出每格狀態：
+    接通數低於 '下限' 為 below、達到 '上限' 為 above；總撥打數低於 '總撥打數下限' 為 below (皆只看大於 0 的值)；其餘週末為 weekend。
+    """
+    heatmap_df = pivot.melt(id_vars=['Group', 'Agent ID', 'Agent Name'], var_name='Date', value_name='Value')
+    heatmap_df['Date'] = pd.to_datetime(heatmap_df['Date'])
+    heatmap_df['Day'] = heatmap_df['Date'].dt.strftime('%m/%d')
+
+    value = heatmap_df['Value']
+    positive = value > 0
+    below = pd.Series(False, index=heatmap_df.index)
+    above = pd.Series(False, index=heatmap_df.index)
+    if metric_key == 'connections':
+        below = positive & (value < threshold_values(heatmap_df['Group'], thresholds, '下限'))
+        above = positive & ~below & (value >= threshold_values(heatmap_df['Group'], thresholds, '上限'))
+    elif metric_key == 'total_calls':
+        below = positive & (value < threshold_values(heatmap_df['Group'], thresholds, '總撥打數下限'))
+    weekend = heatmap_df['Date'].dt.dayofweek >= 5
+    heatmap_df['Status'] = np.select([below, above, weekend], ['below', 'above', 'weekend'], default='normal')
+    return heatmap_df
+
+def build_monthly_heatmap_chart(heatmap_df, metric_title, format_spec=None):
+    """所有組別共用一張分面矩形圖 (每組一列、各自的催員軸)，格內顯示數值。"""
+    value_format = '.1%' if format_spec else ',.0f'
+    groups = [g for g in CUSTOM_GROUP_ORDER if g in set(heatmap_df['Group'].astype(str))]
+    base = alt.Chart().encode(
+        x=alt.X('Day:O', title=None, sort=sorted(heatmap_df['Day'].unique()), axis=alt.Axis(labelAngle=0, orient='top')),
+        y=alt.Y('Agent Name:N', title=None)
+    )
+    rect = base.mark_rect(stroke='#E0E0E0').encode(
+        color=alt.Color('Status:N', scale=alt.Scale(domain=list(HEATMAP_STATUS_COLORS), range=list(HEATMAP_STATUS_COLORS.values())), legend=None),
+        tooltip=[
+            alt.Tooltip('Agent Name:N', title=get_text("monthly_view_heatmap_agent")),
+            alt.Tooltip('Date:T', title=get_text("monthly_view_tooltip_date"), format='%Y-%m-%d'),
+            alt.Tooltip('Value:Q', title=metric_title, format=value_format)
+        ]
+    )
+    text = base.mark_text(fontSize=10).encode(text=alt.Text('Value:Q', format=value_format))
+    return alt.layer(rect, text, data=heatmap_df).properties(
+        height=alt.Step(20)
+    ).facet(
+        row=alt.Row('Group:N', title=None, sort=groups, header=alt.Header(labelAngle=0, labelAlign='left', labelFontWeight='bold'))
+    ).resolve_scale(y='independent')
+
+# --- 月度報告視圖 (讀取催員每日指標表) ---
+def display_monthly_view(views, selected_group, thresholds):
+    st.header(get_text("monthly_view_header"))
 
-    available_months = sorted(df['Date'].dt.to_period('M').unique())
+    group = group_key(selected_group)
+    available_months = views.months(group)
     if not available_months:
         st.info(get_text("monthly_view_no_month_data"))
         return
@@ -524,7 +1231,7 @@ def display_monthly_view(df, selected_group, thresholds):
     )
 
     if selected_month_period:
-        df_month = df[df['Date'].dt.to_period('M') == selected_month_period].copy()
+        df_month = views.slice_month(group, selected_month_period)
 
         if df_month.empty:
             st.info(get_text("monthly_view_no_data_for_month"))
@@ -538,9 +1245,10 @@ def display_monthly_view(df, selected_group, thresholds):
         with tab1:
             st.subheader(get_text("monthly_view_trend_subheader"))
 
-            if 'Daily Received Amount' in df_month.columns and df_month['Daily Received Amount'].sum() > 0:
-                total_connections = df_month['Connected'].sum()
-                total_amount = df_month['Daily Received Amount'].sum()
+            totals, daily_summary = aggregate_monthly_trend(views, views.version, group, selected_month_period)
+            if totals['amount'] > 0:
+                total_connections = totals['connections']
+                total_amount = totals['amount']
                 avg_amount_per_call = (total_amount / total_connections) if total_connections > 0 else 0
 
                 col1, col2, col3 = st.columns(3)
@@ -549,11 +1257,6 @@ def display_monthly_view(df, selected_group, thresholds):
                 col3.metric(get_text("monthly_view_kpi_avg_amount_per_call"), f"${avg_amount_per_call:,.2f}")
                 st.divider()
 
-                daily_summary = df_month.groupby('Date').agg(
-                    Total_Connections=('Connected', 'sum'),
-                    Total_Received_Amount=('Daily Received Amount', 'sum')
-                ).reset_index()
-
                 base = alt.Chart(daily_summary).encode(x=alt.X('Date:T', title=get_text("monthly_view_tooltip_date")))
                 bar = base.mark_bar(color='#4c78a8', opacity=0.7).encode(y=alt.Y('Total_Connections:Q', title=get_text("monthly_view_y_axis_calls")))
                 line = base.mark_line(color='#e45756', strokeWidth=3).encode(y=alt.Y('Total_Received_Amount:Q', title=get_text("monthly_view_y_axis_amount")))
@@ -565,41 +1268,31 @@ def display_monthly_view(df, selected_group, thresholds):
         with tab2:
             st.subheader(get_text("monthly_view_heatmap_subheader"))
 
-            metric_options = [
-                get_text("heatmap_metric_connections"), 
-                get_text("heatmap_metric_total_calls"), 
-                get_text("heatmap_metric_called_coverage")
-            ]
+            metric_keys = {get_text(f"heatmap_metric_{key}"): key for key in HEATMAP_MEASURES}
             selected_metric = st.radio(
                 get_text("monthly_view_heatmap_metric_selector"),
-                metric_options,
+                list(metric_keys),
                 horizontal=True,
                 key="heatmap_metric_selector"
             )
+            metric_key = metric_keys[selected_metric]
+            format_spec = HEATMAP_MEASURES[metric_key]['format']
 
-            format_spec = None
-            if selected_metric == get_text("heatmap_metric_connections"):
-                daily_agg = df_month.groupby(['Date', 'Group', 'Agent ID', 'Agent Name'])['Connected'].sum()
-            elif selected_metric == get_text("heatmap_metric_total_calls"):
-                daily_agg = df_month.groupby(['Date', 'Group', 'Agent ID', 'Agent Name'])['Case No'].size()
-            else:  # Called Coverage
-                daily_agg_raw = df_month.groupby(['Date', 'Group', 'Agent ID', 'Agent Name']).agg(
-                    Total_Case_call=('Case No', 'nunique'),
-                    Cases_on_Hand=('Cases on Hand', 'first')
-                ).reset_index()
-                
-                # --- FIX: Ensure 'Cases on Hand' is numeric before division ---
-                daily_agg_raw['Cases_on_Hand'] = pd.to_numeric(daily_agg_raw['Cases_on_Hand'], errors='coerce').fillna(0)
-
-                daily_agg_raw['Called_Coverage'] = np.where(
-                    daily_agg_raw['Cases_on_Hand'] > 0,
-                    daily_agg_raw['Total_Case_call'] / daily_agg_raw['Cases_on_Hand'],
-                    0
-                )
-                daily_agg = daily_agg_raw.set_index(['Date', 'Group', 'Agent ID', 'Agent Name'])['Called_Coverage']
-                format_spec = '{:.1%}'
+            # 切換指標只是從已快取的寬表取出對應欄位，不再重新彙總
+            pivot = aggregate_monthly_heatmap(views, views.version, group, selected_month_period)[metric_key].reset_index()
 
-            pivot = daily_agg.unstack(level='Date', fill_value=0).reset_index()
+            render_options = get_text("monthly_view_heatmap_render_options")
+            render_mode = st.radio(
+                get_text("monthly_view_heatmap_render_mode"),
+                render_options,
+                horizontal=True,
+                key="heatmap_render_mode"
+            )
+            if render_mode == render_options[1]:
+                # 所有組別畫在同一張分面圖，頁面大小與繪製時間不再隨組數與人數各自產生表格而增加
+                heatmap_df = heatmap_long_format(pivot, metric_key, thresholds)
+                st.altair_chart(build_monthly_heatmap_chart(heatmap_df, selected_metric, format_spec), use_container_width=True)
+                return
 
             def style_performance(row, date_cols_to_style, metric_for_styling, weekend_cols):
                 styles = pd.Series('', index=row.index)
@@ -717,14 +1410,48 @@ def display_monthly_view(df, selected_group, thresholds):
                     column_config=column_config
                 )
 
+# --- 行為分析的彙總：通話時長分佈與各區間的回收轉換率 (依參數快取，讀取通話時長直方圖)；date 與 month 擇一，agent 為 None 代表全部催員 ---
+@st.cache_data(max_entries=VIEW_CACHE_MAX_ENTRIES)
+def aggregate_talk_duration_view(_views, _talk_views, version, group, agent, date=None, month=None):
+    """回傳 (期間通話數, 各時長區間通話數, 各區間回收轉換率)；沒有有效通話時長時後兩者為 None，沒有回收資料時轉換率為 None。"""
+    if date is not None:
+        cube_period, histogram = _views.slice_date(group, date), _talk_views.slice_date(group, date)
+    else:
+        cube_period, histogram = _views.slice_month(group, month), _talk_views.slice_month(group, month)
+    if agent is not None:
+        cube_period = cube_period[cube_period['Agent Name'] == agent]
+        histogram = histogram[histogram['Agent Name'] == agent]
+    n_calls = int(cube_period['Total_Outbound_Call'].sum())
+    if histogram.empty:
+        return n_calls, None, None
+
+    # 只保留實際出現的區間
+    buckets = bucket_talk_histogram(histogram, columns=('Calls', 'Recovered_Calls'))
+    buckets = buckets[buckets['Calls'] > 0].reset_index(drop=True)
+    category_counts = pd.DataFrame({'Category': buckets['Category'], 'Count': buckets['Calls']})
+    category_counts['Percentage'] = category_counts['Count'] / category_counts['Count'].sum()
+
+    # 回收轉換率：各區間的通話中，發生在催員當日有回收的比例
+    agg_data = None
+    if buckets['Recovered_Calls'].sum() > 0:
+        agg_data = pd.DataFrame({
+            'Talk_Duration_Category': buckets['Category'],
+            'Count': buckets['Calls'],
+            'Recovered_Calls': buckets['Recovered_Calls'],
+            'Conversion_Rate': buckets['Recovered_Calls'] / buckets['Calls'],
+            'Category': buckets['Category']
+        })
+    return n_calls, category_counts, agg_data
+
 # --- 催員催收行為分析 ---
-def display_behavior_analysis_view(df, selected_group):
+def display_behavior_analysis_view(views, selected_group, talk_views):
     st.header(get_text("behavior_view_header"))
 
-    if selected_group != get_text("all_teams"):
-        df = df[df['Group'] == selected_group].copy()
+    group = group_key(selected_group)
+    cube = views.frame(group)
 
-    agent_list = [get_text("behavior_view_all_agents")] + sorted(df['Agent Name'].unique())
+    # 催員與日期選單取自催員每日指標表，通話時長分佈取自通話時長直方圖
+    agent_list = [get_text("behavior_view_all_agents")] + sorted(cube['Agent Name'].unique())
     if len(agent_list) == 1:
         st.info(get_text("behavior_view_no_data_in_team").format(selected_group=selected_group))
         return
@@ -732,35 +1459,41 @@ def display_behavior_analysis_view(df, selected_group):
     selected_agent = st.selectbox(get_text("behavior_view_agent_selector"), agent_list, key="behavior_agent_select")
 
     if selected_agent == get_text("behavior_view_all_agents"):
-        df_to_analyze = df.copy()
+        cube_to_analyze = None
+        agent = None
         analysis_subject_name = f"{selected_group} {get_text('behavior_view_all_agents')}" if selected_group != get_text("all_teams") else f"{get_text('all_teams')} {get_text('behavior_view_all_agents')}"
     else:
-        df_to_analyze = df[df['Agent Name'] == selected_agent].copy()
+        cube_to_analyze = cube[cube['Agent Name'] == selected_agent]
+        agent = selected_agent
         analysis_subject_name = selected_agent
 
     analysis_period = st.radio(get_text("behavior_view_analysis_period"), get_text("behavior_view_period_options"), horizontal=True, key="behavior_period")
 
     if analysis_period == get_text("behavior_view_period_options")[0]:
-        available_dates = sorted(df_to_analyze['Date'].dt.date.unique(), reverse=True)
+        if cube_to_analyze is None:
+            available_dates = views.dates(group)
+        else:
+            available_dates = sorted(cube_to_analyze['Date'].dt.date.unique(), reverse=True)
         if not available_dates:
             st.warning(get_text("behavior_view_no_records_warning").format(analysis_subject_name=analysis_subject_name))
             return
         selected_date = st.selectbox(get_text("daily_view_date_selector"), available_dates, key="behavior_date_select")
-        df_filtered = df_to_analyze[df_to_analyze['Date'].dt.date == selected_date]
+        n_calls, category_counts, agg_data = aggregate_talk_duration_view(views, talk_views, views.version, group, agent, date=selected_date)
     else:
-        available_months = sorted(df_to_analyze['Date'].dt.to_period('M').unique())
+        if cube_to_analyze is None:
+            available_months = views.months(group)
+        else:
+            available_months = sorted(cube_to_analyze['Date'].dt.to_period('M').unique())
         if not available_months:
             st.warning(get_text("behavior_view_no_records_warning").format(analysis_subject_name=analysis_subject_name))
             return
         selected_month = st.selectbox(get_text("monthly_view_month_selector"), available_months, format_func=lambda p: p.strftime('%Y-%m'), key="behavior_month_select")
-        df_filtered = df_to_analyze[df_to_analyze['Date'].dt.to_period('M') == selected_month]
+        n_calls, category_counts, agg_data = aggregate_talk_duration_view(views, talk_views, views.version, group, agent, month=selected_month)
 
-    if df_filtered.empty:
+    if n_calls == 0:
         st.info(get_text("daily_view_no_records_for_date").format(selected_date="selected period"))
         return
-
-    df_filtered = df_filtered[df_filtered['Talk Durations'].dt.total_seconds() > 0].copy()
-    if df_filtered.empty:
+    if category_counts is None:
         st.info(get_text("behavior_view_no_valid_talk_duration"))
         return
 
@@ -768,27 +1501,9 @@ def display_behavior_analysis_view(df, selected_group):
         get_text("behavior_view_tab_original"),
         get_text("behavior_view_tab_effective")
     ])
-
-    def categorize_talk_duration(seconds):
-        if seconds <= 5: return "~5s"
-        elif 5 < seconds <= 10: return "5s - 10s"
-        elif 10 < seconds <= 30: return "10s - 30s"
-        elif 30 < seconds <= 60: return "30s - 1min"
-        elif 60 < seconds <= 120: return "1min - 2min"
-        elif 120 < seconds <= 180: return "2min - 3min"
-        else: return "> 3min"
-
-    df_filtered['Talk_Duration_Category'] = df_filtered['Talk Durations'].dt.total_seconds().apply(categorize_talk_duration)
-    category_order = ["~5s", "5s - 10s", "10s - 30s", "30s - 1min", "1min - 2min", "2min - 3min", "> 3min"]
+    category_order = TALK_DURATION_CATEGORIES
 
     with tab1:
-        category_counts = df_filtered['Talk_Duration_Category'].value_counts().reset_index()
-        category_counts.columns = ['Category', 'Count']
-        category_counts['Category'] = pd.Categorical(category_counts['Category'], categories=category_order, ordered=True)
-        category_counts = category_counts.sort_values('Category')
-        total_calls = category_counts['Count'].sum()
-        category_counts['Percentage'] = (category_counts['Count'] / total_calls) if total_calls > 0 else 0
-
         y_axis_option = st.radio(get_text("behavior_view_y_axis_option"), get_text("behavior_view_y_axis_options"), horizontal=True, key="behavior_y_axis_original")
         y_field, y_title, y_axis_format = ('Count', get_text("behavior_view_y_axis_count"), 's') if y_axis_option == get_text("behavior_view_y_axis_options")[0] else ('Percentage', get_text("behavior_view_y_axis_percentage"), '%')
 
@@ -804,23 +1519,7 @@ def display_behavior_analysis_view(df, selected_group):
         st.altair_chart(chart, use_container_width=True)
 
     with tab2:
-        if 'Daily Received Amount' in df_filtered.columns and df_filtered['Daily Received Amount'].sum() > 0:
-
-            total_calls_agg = df_filtered.groupby('Talk_Duration_Category').agg(
-                Count=('Case No', 'size')
-            ).reset_index()
-
-            recovered_calls_df = df_filtered[df_filtered['Daily Received Amount'] > 0]
-            recovered_cases_agg = recovered_calls_df.groupby('Talk_Duration_Category').agg(
-                Recovered_Cases=('Case No', 'nunique')
-            ).reset_index()
-
-            agg_data = pd.merge(total_calls_agg, recovered_cases_agg, on='Talk_Duration_Category', how='left').fillna(0)
-            agg_data['Conversion_Rate'] = np.where(agg_data['Count'] > 0, agg_data['Recovered_Cases'] / agg_data['Count'], 0)
-            agg_data['Category'] = pd.Categorical(agg_data['Talk_Duration_Category'], categories=category_order, ordered=True)
-            agg_data = agg_data.sort_values('Category')
-            agg_data['Recovered_Cases'] = agg_data['Recovered_Cases'].astype(int)
-
+        if agg_data is not None:
             base = alt.Chart(agg_data).encode(
                 x=alt.X('Talk_Duration_Category:N', sort=category_order, title=get_text("behavior_view_x_axis"), axis=alt.Axis(labelAngle=0))
             )
@@ -838,7 +1537,7 @@ def display_behavior_analysis_view(df, selected_group):
                 tooltip=[
                     alt.Tooltip('Talk_Duration_Category', title=get_text("behavior_view_tooltip_category")),
                     alt.Tooltip('Conversion_Rate', title=get_text("behavior_view_tooltip_conversion_rate"), format=".2%"),
-                    alt.Tooltip('Recovered_Cases', title=get_text("behavior_view_tooltip_recovered_cases"))
+                    alt.Tooltip('Recovered_Calls', title=get_text("behavior_view_tooltip_recovered_calls"))
                 ]
             )
 
@@ -853,14 +1552,49 @@ def display_behavior_analysis_view(df, selected_group):
             st.info(get_text("behavior_view_no_recovery_data"))
 
 
+# --- 時點分析的彙總：期間內每分鐘 (0-1439) 的撥打數、接通數與回收金額 (依參數快取，與時段粒度無關)；date 與 month 擇一，agent 為 None 代表全部催員 ---
+@st.cache_data(max_entries=VIEW_CACHE_MAX_ENTRIES)
+def aggregate_minute_of_day(_minute_views, version, group, agent, date=None, month=None):
+    """回傳以分鐘為索引、長度 1440 的統計表；期間內沒有通話時回傳 None。"""
+    histogram = _minute_views.slice_date(group, date) if date is not None else _minute_views.slice_month(group, month)
+    if agent is not None:
+        histogram = histogram[histogram['Agent Name'] == agent]
+    if histogram.empty:
+        return None
+    minutes = histogram['Minute'].to_numpy()
+    return pd.DataFrame({
+        'Total_Outbound_Calls': np.bincount(minutes, weights=histogram['Calls'], minlength=MINUTES_PER_DAY).astype('int64'),
+        'Total_Connected_Calls': np.bincount(minutes, weights=histogram['Connected_Calls'], minlength=MINUTES_PER_DAY).astype('int64'),
+        'Total_Received_Amount': np.bincount(minutes, weights=histogram['Received_Amount'], minlength=MINUTES_PER_DAY)
+    })
+
+def resample_minute_of_day(minute_stats, interval_minutes):
+    """將每分鐘統計以相鄰加總併成 interval_minutes 分鐘一段 (只列出有撥打的時段)，並計算接通率、佔比等衍生指標。"""
+    starts = np.arange(0, MINUTES_PER_DAY, interval_minutes)
+    calls, connected, amount = (np.add.reduceat(minute_stats[col].to_numpy(), starts) for col in minute_stats.columns)
+    has_calls = calls > 0
+    starts, calls, connected, amount = starts[has_calls], calls[has_calls], connected[has_calls], amount[has_calls]
+    total_outbound, total_connected = calls.sum(), connected.sum()
+    return pd.DataFrame({
+        'Time_Interval_Label': MINUTE_OF_DAY_LABELS[starts],
+        'Total_Outbound_Calls': calls,
+        'Total_Connected_Calls': connected,
+        'Total_Received_Amount': amount,
+        'Connection_Rate': connected / calls,
+        'Avg_Amount_per_Call': amount / calls,
+        'Outbound_Call_Percentage': calls / total_outbound if total_outbound > 0 else 0,
+        'Connected_Call_Percentage': connected / total_connected if total_connected > 0 else 0
+    })
+
 # --- 催員時點撥打與接通分析 ---
-def display_call_time_analysis_view(df, selected_group):
+def display_call_time_analysis_view(views, selected_group, minute_views):
     st.header(get_text("call_time_view_header"))
 
-    if selected_group != get_text("all_teams"):
-        df = df[df['Group'] == selected_group].copy()
+    group = group_key(selected_group)
+    cube = views.frame(group)
 
-    agent_list = [get_text("behavior_view_all_agents")] + sorted(df['Agent Name'].unique())
+    # 催員與日期選單取自催員每日指標表，時段統計取自每分鐘撥打直方圖
+    agent_list = [get_text("behavior_view_all_agents")] + sorted(cube['Agent Name'].unique())
     if len(agent_list) == 1:
         st.info(get_text("behavior_view_no_data_in_team").format(selected_group=selected_group))
         return
@@ -868,66 +1602,54 @@ def display_call_time_analysis_view(df, selected_group):
     selected_agent = st.selectbox(get_text("behavior_view_agent_selector"), agent_list, key="call_time_agent_select")
 
     if selected_agent == get_text("behavior_view_all_agents"):
-        df_to_analyze = df.copy()
+        cube_to_analyze = None
+        agent = None
         analysis_subject_name = f"{selected_group} {get_text('behavior_view_all_agents')}" if selected_group != get_text("all_teams") else f"{get_text('all_teams')} {get_text('behavior_view_all_agents')}"
     else:
-        df_to_analyze = df[df['Agent Name'] == selected_agent].copy()
+        cube_to_analyze = cube[cube['Agent Name'] == selected_agent]
+        agent = selected_agent
         analysis_subject_name = selected_agent
 
     analysis_period = st.radio(get_text("behavior_view_analysis_period"), get_text("behavior_view_period_options"), horizontal=True, key="call_time_period")
 
     if analysis_period == get_text("behavior_view_period_options")[0]:
-        available_dates = sorted(df_to_analyze['Date'].dt.date.unique(), reverse=True)
+        if cube_to_analyze is None:
+            available_dates = views.dates(group)
+        else:
+            available_dates = sorted(cube_to_analyze['Date'].dt.date.unique(), reverse=True)
         if not available_dates:
             st.warning(get_text("behavior_view_no_records_warning").format(analysis_subject_name=analysis_subject_name))
             return
         selected_date = st.selectbox(get_text("daily_view_date_selector"), available_dates, key="call_time_date_select")
-        df_filtered = df_to_analyze[df_to_analyze['Date'].dt.date == selected_date]
+        period = {'date': selected_date}
     else:
-        available_months = sorted(df_to_analyze['Date'].dt.to_period('M').unique())
+        if cube_to_analyze is None:
+            available_months = views.months(group)
+        else:
+            available_months = sorted(cube_to_analyze['Date'].dt.to_period('M').unique())
         if not available_months:
             st.warning(get_text("behavior_view_no_records_warning").format(analysis_subject_name=analysis_subject_name))
             return
         selected_month = st.selectbox(get_text("monthly_view_month_selector"), available_months, format_func=lambda p: p.strftime('%Y-%m'), key="call_time_month_select")
-        df_filtered = df_to_analyze[df_to_analyze['Date'].dt.to_period('M') == selected_month]
-
-    if df_filtered.empty:
-        st.info(get_text("daily_view_no_records_for_date").format(selected_date="selected period"))
-        return
+        period = {'month': selected_month}
 
     granularity_map = dict(zip(get_text("call_time_view_granularity_options"), ["小時", "30分鐘", "15分鐘"]))
     time_granularity_display = st.selectbox(get_text("call_time_view_granularity_selector"), get_text("call_time_view_granularity_options"), key="time_granularity")
     time_granularity = granularity_map[time_granularity_display]
 
-    if time_granularity == "小時":
-        df_filtered['Time_Interval_Label'] = df_filtered['Call Assigned'].dt.strftime('%H:00')
-    elif time_granularity == "30分鐘":
-        df_filtered['Time_Interval_Label'] = df_filtered['Call Assigned'].dt.floor('30min').dt.strftime('%H:%M')
-    else:
-        df_filtered['Time_Interval_Label'] = df_filtered['Call Assigned'].dt.floor('15min').dt.strftime('%H:%M')
-
-    hourly_stats = df_filtered.groupby('Time_Interval_Label').agg(
-        Total_Outbound_Calls=('Case No', 'size'),
-        Total_Connected_Calls=('Connected', 'sum'),
-        Total_Received_Amount=('Daily Received Amount', 'sum')
-    ).reset_index()
-
-    hourly_stats['Time_Interval_Sort'] = pd.to_datetime(hourly_stats['Time_Interval_Label'], format='%H:%M').dt.time
-    hourly_stats = hourly_stats.sort_values('Time_Interval_Sort').drop(columns='Time_Interval_Sort')
-
-    hourly_stats['Connection_Rate'] = np.where(hourly_stats['Total_Outbound_Calls'] > 0, hourly_stats['Total_Connected_Calls'] / hourly_stats['Total_Outbound_Calls'], 0)
-    hourly_stats['Avg_Amount_per_Call'] = np.where(hourly_stats['Total_Outbound_Calls'] > 0, hourly_stats['Total_Received_Amount'] / hourly_stats['Total_Outbound_Calls'], 0)
-
-    total_outbound = hourly_stats['Total_Outbound_Calls'].sum()
-    total_connected = hourly_stats['Total_Connected_Calls'].sum()
-    hourly_stats['Outbound_Call_Percentage'] = (hourly_stats['Total_Outbound_Calls'] / total_outbound) if total_outbound > 0 else 0
-    hourly_stats['Connected_Call_Percentage'] = (hourly_stats['Total_Connected_Calls'] / total_connected) if total_connected > 0 else 0
+    minute_stats = aggregate_minute_of_day(minute_views, minute_views.version, group, agent, **period)
+    if minute_stats is None:
+        st.info(get_text("daily_view_no_records_for_date").format(selected_date="selected period"))
+        return
+    # 切換粒度只是把快取的每分鐘統計相鄰加總，不再回頭處理通話明細
+    hourly_stats = resample_minute_of_day(minute_stats, TIME_GRANULARITY_MINUTES[time_granularity])
+    has_recovery = hourly_stats['Total_Received_Amount'].sum() > 0
 
     display_mode = st.radio(get_text("call_time_view_display_mode"), get_text("call_time_view_display_mode_options"), horizontal=True, key="call_time_display_mode")
 
     heatmap_metric = get_text("call_time_view_heatmap_options")[0]
     if display_mode == get_text("call_time_view_display_mode_options")[2]:
-        if 'Daily Received Amount' in df_filtered.columns and df_filtered['Daily Received Amount'].sum() > 0:
+        if has_recovery:
             heatmap_metric = st.radio(get_text("call_time_view_heatmap_metric"), get_text("call_time_view_heatmap_options"), horizontal=True, key="heatmap_metric_select")
         else:
             st.info(get_text("call_time_view_no_recovery_data"))
@@ -993,12 +1715,102 @@ def display_call_time_analysis_view(df, selected_group):
     if chart:
         st.altair_chart(chart, use_container_width=True)
 
+# --- 個人剖析的彙總：時段與通話時長分佈、績效指標 (依參數快取)；date 與 month 擇一，benchmark_agents 為標竿催員 tuple ---
+@st.cache_data(max_entries=VIEW_CACHE_MAX_ENTRIES)
+def aggregate_profiling_view(_views, _talk_views, _load_month_calls, version, group, agent, benchmark_agents, date=None, month=None):
+    """
+    回傳 (時段比較表, 通話時長比較表, 催員績效指標, 標竿平均績效指標, 是否有標竿通話)；期間內沒有通話時回傳 None。
+    績效指標以 recovery_amount / connected_coverage / avg_talk_duration 為鍵，顯示名稱由視圖決定。
+    """
+    if date is not None:
+        df_period = select_calls(_load_month_calls(pd.Period(date, freq='M')), group, date=date)
+        cube_period = _views.slice_date(group, date)
+        histogram_period = _talk_views.slice_date(group, date)
+    else:
+        df_period = select_calls(_load_month_calls(month), group)
+        cube_period = _views.slice_month(group, month)
+        histogram_period = _talk_views.slice_month(group, month)
+
+    if df_period.empty:
+        return None
+
+    df_agent = df_period[df_period['Agent Name'] == agent]
+    cube_agent = cube_period[cube_period['Agent Name'] == agent]
+    df_benchmark = pd.DataFrame()
+    cube_benchmark = pd.DataFrame()
+    if benchmark_agents:
+        df_benchmark = df_period[df_period['Agent Name'].isin(benchmark_agents)]
+        cube_benchmark = cube_period[cube_period['Agent Name'].isin(benchmark_agents)]
+
+    # --- 時段分佈 ---
+    df_agent['Time_Interval'] = df_agent['Call Assigned'].dt.floor('h').dt.strftime('%H:00')
+    agent_time_stats = df_agent['Time_Interval'].value_counts().reset_index()
+    agent_time_stats.columns = ['Time_Interval', 'Agent_Calls']
+    if not df_benchmark.empty:
+        df_benchmark['Time_Interval'] = df_benchmark['Call Assigned'].dt.floor('h').dt.strftime('%H:00')
+        benchmark_time_stats = df_benchmark.groupby('Time_Interval')['Case No'].count()
+        num_benchmark_agents = df_benchmark['Agent ID'].nunique()
+        benchmark_avg_time_stats = (benchmark_time_stats / num_benchmark_agents).reset_index()
+        benchmark_avg_time_stats.columns = ['Time_Interval', 'Benchmark_Avg_Calls']
+        comparison_df = pd.merge(agent_time_stats, benchmark_avg_time_stats, on='Time_Interval', how='outer').fillna(0)
+    else:
+        comparison_df = agent_time_stats
+        comparison_df['Benchmark_Avg_Calls'] = 0
+    comparison_df = comparison_df.sort_values('Time_Interval')
+
+    # --- 通話時長分佈 (取自通話時長直方圖；標竿為所有標竿催員合計的分佈) ---
+    def duration_ratios(histogram):
+        counts = bucket_talk_histogram(histogram)['Calls']
+        return counts / counts.sum() if counts.sum() > 0 else counts * 0.0
+
+    duration_comparison_df = pd.DataFrame({
+        'Category': pd.Categorical(TALK_DURATION_CATEGORIES, categories=TALK_DURATION_CATEGORIES, ordered=True),
+        'Agent_Ratio': duration_ratios(histogram_period[histogram_period['Agent Name'] == agent]),
+        'Benchmark_Avg_Ratio': duration_ratios(histogram_period[histogram_period['Agent Name'].isin(benchmark_agents or ())])
+    })
+    duration_comparison_df = duration_comparison_df[(duration_comparison_df['Agent_Ratio'] > 0) | (duration_comparison_df['Benchmark_Avg_Ratio'] > 0)]
+
+    # --- V16.0 績效指標 ---
+    def calculate_kpis(df_to_calc, cube_to_calc, is_benchmark=False):
+        if df_to_calc.empty or cube_to_calc.empty:
+            return {'recovery_amount': 0, 'connected_coverage': 0, 'avg_talk_duration': 0}
+
+        num_agents = cube_to_calc['Agent ID'].nunique() if is_benchmark else 1
+        if num_agents == 0: num_agents = 1 # Avoid division by zero
+
+        # 1. 回收總金額 (每位催員每日一筆，不受通話筆數影響)
+        total_recovery = cube_to_calc['Daily_Received_Amount'].sum()
+
+        # 2. 接通案件覆蓋率 (在手案件數取自催員每日指標表；期間內不重複的接通案件需讀取通話明細)
+        cases_on_hand = cube_to_calc['Cases_on_Hand'].sum()
+
+        connected_cases = distinct_count(key_codes(df_to_calc['Case No'])[df_to_calc['Connected'].to_numpy() == 1])
+
+        total_recovery_kpi = total_recovery / num_agents
+        connected_coverage = (connected_cases / cases_on_hand) if cases_on_hand > 0 else 0
+
+        # 3. 平均通話時長
+        total_talk_seconds = cube_to_calc['Total_Talk_Duration'].dt.total_seconds().sum()
+        total_connected_calls = cube_to_calc['Total_Outbound_Call_Success'].sum()
+        avg_talk_duration = (total_talk_seconds / total_connected_calls) if total_connected_calls > 0 else 0
+
+        return {
+            'recovery_amount': total_recovery_kpi,
+            'connected_coverage': connected_coverage,
+            'avg_talk_duration': avg_talk_duration
+        }
+
+    has_benchmark = not df_benchmark.empty
+    agent_kpis = calculate_kpis(df_agent, cube_agent)
+    benchmark_kpis = calculate_kpis(df_benchmark, cube_benchmark, is_benchmark=True) if has_benchmark else {k: 0 for k in agent_kpis}
+    return comparison_df, duration_comparison_df, agent_kpis, benchmark_kpis, has_benchmark
+
 # --- 催員行為與高績效人員比較 ---
-def display_profiling_view(df, selected_group):
+def display_profiling_view(views, selected_group, load_month_calls, talk_views):
     st.header(get_text("profiling_view_header"))
-    if selected_group != get_text("all_teams"):
-        df = df[df['Group'] == selected_group].copy()
-    agent_list = sorted(df['Agent Name'].unique())
+    group = group_key(selected_group)
+    # 催員與日期選單取自催員每日指標表，通話明細只載入選定的月份
+    agent_list = sorted(views.frame(group)['Agent Name'].unique())
     if not agent_list:
         st.info(get_text("behavior_view_no_data_in_team").format(selected_group=selected_group))
         return
@@ -1021,15 +1833,14 @@ def display_profiling_view(df, selected_group):
         analysis_period = st.radio(get_text("profiling_view_period_selector"), get_text("profiling_view_period_options"), horizontal=True, key="profiling_period")
 
     if analysis_period == get_text("profiling_view_period_options")[0]: # 單日
-        available_dates = sorted(df['Date'].dt.date.unique(), reverse=True)
+        available_dates = views.dates(group)
         if not available_dates:
             st.warning(get_text("profiling_view_no_date_warning"))
             return
         selected_date = st.selectbox(get_text("daily_view_date_selector"), available_dates, key="profiling_date_select")
-        df_period = df[df['Date'].dt.date == selected_date]
+        aggregated = aggregate_profiling_view(views, talk_views, load_month_calls, views.version, group, selected_agent, tuple(benchmark_agents), date=selected_date)
     else: # 月份
-        df['Month'] = df['Date'].dt.to_period('M')
-        available_months = sorted(df['Month'].unique(), reverse=True)
+        available_months = views.months(group)[::-1]
         if not available_months:
             st.warning(get_text("profiling_view_no_month_warning"))
             return
@@ -1039,42 +1850,24 @@ def display_profiling_view(df, selected_group):
             format_func=lambda p: p.strftime('%Y-%m'),
             key="profiling_month_select"
         )
-        df_period = df[df['Month'] == selected_month]
+        aggregated = aggregate_profiling_view(views, talk_views, load_month_calls, views.version, group, selected_agent, tuple(benchmark_agents), month=selected_month)
 
-    if df_period.empty:
+    if aggregated is None:
         st.info(get_text("daily_view_no_records_for_date").format(selected_date="selected period"))
         return
-
-    df_agent = df_period[df_period['Agent Name'] == selected_agent]
-    df_benchmark = pd.DataFrame()
-    if benchmark_agents:
-        df_benchmark = df_period[df_period['Agent Name'].isin(benchmark_agents)]
+    comparison_df, duration_comparison_df, agent_kpis, benchmark_kpis, has_benchmark = aggregated
 
     # --- 行為模式比較 ---
     st.subheader(get_text("profiling_view_behavior_subheader"))
     st.markdown(f"**{get_text('profiling_view_time_chart_title').format(selected_agent=selected_agent)}**")
 
-    df_agent['Time_Interval'] = df_agent['Call Assigned'].dt.floor('H').dt.strftime('%H:00')
-    agent_time_stats = df_agent['Time_Interval'].value_counts().reset_index()
-    agent_time_stats.columns = ['Time_Interval', 'Agent_Calls']
-    if not df_benchmark.empty:
-        df_benchmark['Time_Interval'] = df_benchmark['Call Assigned'].dt.floor('H').dt.strftime('%H:00')
-        benchmark_time_stats = df_benchmark.groupby('Time_Interval')['Case No'].count()
-        num_benchmark_agents = df_benchmark['Agent ID'].nunique()
-        benchmark_avg_time_stats = (benchmark_time_stats / num_benchmark_agents).reset_index()
-        benchmark_avg_time_stats.columns = ['Time_Interval', 'Benchmark_Avg_Calls']
-        comparison_df = pd.merge(agent_time_stats, benchmark_avg_time_stats, on='Time_Interval', how='outer').fillna(0)
-    else:
-        comparison_df = agent_time_stats
-        comparison_df['Benchmark_Avg_Calls'] = 0
-    comparison_df = comparison_df.sort_values('Time_Interval')
     base = alt.Chart(comparison_df).encode(x=alt.X('Time_Interval', title=get_text("call_time_view_x_axis"), sort=None, axis=alt.Axis(labelAngle=0)))
     bar = base.mark_bar().encode(
         y=alt.Y('Agent_Calls', title=get_text("profiling_view_time_y_axis")),
         tooltip=[alt.Tooltip('Time_Interval', title=get_text("profiling_view_time_tooltip_time")), alt.Tooltip('Agent_Calls', title=get_text("profiling_view_time_tooltip_agent"))]
     )
     chart_layers = [bar]
-    if not df_benchmark.empty:
+    if has_benchmark:
         line = base.mark_line(color='red', strokeDash=[5,5]).encode(
             y=alt.Y('Benchmark_Avg_Calls', title=get_text("profiling_view_time_y_axis")),
         )
@@ -1088,42 +1881,14 @@ def display_profiling_view(df, selected_group):
         use_container_width=True
     )
     st.markdown(f"**{get_text('profiling_view_duration_chart_title').format(selected_agent=selected_agent)}**")
-    def categorize_talk_duration(seconds):
-        if seconds <= 5: return "~5s"
-        elif 5 < seconds <= 10: return "5s - 10s"
-        elif 10 < seconds <= 30: return "10s - 30s"
-        elif 30 < seconds <= 60: return "30s - 1min"
-        elif 60 < seconds <= 120: return "1min - 2min"
-        elif 120 < seconds <= 180: return "2min - 3min"
-        else: return "> 3min"
-    category_order = ["~5s", "5s - 10s", "10s - 30s", "30s - 1min", "1min - 2min", "2min - 3min", "> 3min"]
-    df_agent_valid_talk = df_agent[df_agent['Talk Durations'].dt.total_seconds() > 0]
-    if not df_agent_valid_talk.empty:
-        df_agent_valid_talk['Category'] = df_agent_valid_talk['Talk Durations'].dt.total_seconds().apply(categorize_talk_duration)
-        agent_duration_dist = df_agent_valid_talk['Category'].value_counts(normalize=True).reset_index()
-        agent_duration_dist.columns = ['Category', 'Agent_Ratio']
-    else:
-        agent_duration_dist = pd.DataFrame(columns=['Category', 'Agent_Ratio'])
-    if not df_benchmark.empty:
-        df_benchmark_valid_talk = df_benchmark[df_benchmark['Talk Durations'].dt.total_seconds() > 0]
-        if not df_benchmark_valid_talk.empty:
-            df_benchmark_valid_talk['Category'] = df_benchmark_valid_talk['Talk Durations'].dt.total_seconds().apply(categorize_talk_duration)
-            benchmark_duration_dist = df_benchmark_valid_talk['Category'].value_counts(normalize=True).reset_index()
-            benchmark_duration_dist.columns = ['Category', 'Benchmark_Avg_Ratio']
-            duration_comparison_df = pd.merge(agent_duration_dist, benchmark_duration_dist, on='Category', how='outer').fillna(0)
-        else:
-            duration_comparison_df = agent_duration_dist
-            duration_comparison_df['Benchmark_Avg_Ratio'] = 0
-    else:
-        duration_comparison_df = agent_duration_dist
-        duration_comparison_df['Benchmark_Avg_Ratio'] = 0
+    category_order = TALK_DURATION_CATEGORIES
     base_dur = alt.Chart(duration_comparison_df).encode(x=alt.X('Category', title=get_text("behavior_view_x_axis"), sort=category_order, axis=alt.Axis(labelAngle=0)))
     bar_dur = base_dur.mark_bar().encode(
         y=alt.Y('Agent_Ratio', title=get_text("profiling_view_duration_y_axis"), axis=alt.Axis(format='%')),
         tooltip=[alt.Tooltip('Category', title=get_text("profiling_view_duration_tooltip_category")), alt.Tooltip('Agent_Ratio', title=get_text("profiling_view_duration_tooltip_agent"), format='.1%')]
     )
     chart_dur_layers = [bar_dur]
-    if not df_benchmark.empty:
+    if has_benchmark:
         line_dur = base_dur.mark_line(color='red', strokeDash=[5,5]).encode(
             y=alt.Y('Benchmark_Avg_Ratio', title=get_text("profiling_view_duration_y_axis"), axis=alt.Axis(format='%')),
         )
@@ -1141,54 +1906,12 @@ def display_profiling_view(df, selected_group):
     st.subheader(get_text("profiling_view_performance_subheader"))
     st.markdown(f"**{get_text('profiling_view_performance_chart_title').format(selected_agent=selected_agent)}**")
 
-    def calculate_kpis(df_to_calc, is_benchmark=False):
-        if df_to_calc.empty:
-            return {
-                get_text("profiling_metric_recovery_amount"): 0,
-                get_text("profiling_metric_connected_coverage"): 0,
-                get_text("profiling_metric_avg_talk_duration"): 0
-            }
-
-        num_agents = df_to_calc['Agent ID'].nunique() if is_benchmark else 1
-        if num_agents == 0: num_agents = 1 # Avoid division by zero
-
-        # 1. 回收總金額
-        total_recovery = df_to_calc['Daily Received Amount'].sum()
-
-        # 2. 接通案件覆蓋率
-        if is_benchmark:
-            cases_on_hand = df_to_calc.groupby(['Date', 'Agent ID'])['Cases on Hand'].first().sum()
-        else:
-             cases_on_hand = df_to_calc.groupby('Date')['Cases on Hand'].first().sum()
-
-        connected_cases = df_to_calc[df_to_calc['Connected'] == 1]['Case No'].nunique()
-
-        total_recovery_kpi = total_recovery / num_agents
-        connected_coverage = (connected_cases / cases_on_hand) if cases_on_hand > 0 else 0
-
-        # 3. 平均通話時長
-        total_talk_seconds = df_to_calc['Talk Durations'].dt.total_seconds().sum()
-        total_connected_calls = df_to_calc['Connected'].sum()
-        avg_talk_duration = (total_talk_seconds / total_connected_calls) if total_connected_calls > 0 else 0
-
-        return {
-            get_text("profiling_metric_recovery_amount"): total_recovery_kpi,
-            get_text("profiling_metric_connected_coverage"): connected_coverage,
-            get_text("profiling_metric_avg_talk_duration"): avg_talk_duration
-        }
-
-    agent_kpis = calculate_kpis(df_agent)
-    benchmark_kpis = calculate_kpis(df_benchmark, is_benchmark=True) if not df_benchmark.empty else agent_kpis
-
-    if df_benchmark.empty:
-         benchmark_kpis = {k: 0 for k in agent_kpis}
-
-
     kpi_data = []
     for metric in agent_kpis.keys():
-        kpi_data.append({"Metric": metric, "Value": agent_kpis[metric], "Group": get_text("profiling_view_performance_agent")})
-        if not df_benchmark.empty:
-            kpi_data.append({"Metric": metric, "Value": benchmark_kpis[metric], "Group": get_text("profiling_view_performance_benchmark")})
+        metric_label = get_text(f"profiling_metric_{metric}")
+        kpi_data.append({"Metric": metric_label, "Value": agent_kpis[metric], "Group": get_text("profiling_view_performance_agent")})
+        if has_benchmark:
+            kpi_data.append({"Metric": metric_label, "Value": benchmark_kpis[metric], "Group": get_text("profiling_view_performance_benchmark")})
 
     kpi_df = pd.DataFrame(kpi_data)
 
@@ -1204,18 +1927,31 @@ def display_profiling_view(df, selected_group):
         ).properties(
             width=alt.Step(40)
         ).facet(
-            column=alt.Column('Metric:N', title=get_text("profiling_view_performance_metric"), sort=list(agent_kpis.keys()), header=alt.Header(labelOrient='bottom'))
+            column=alt.Column('Metric:N', title=get_text("profiling_view_performance_metric"), sort=[get_text(f"profiling_metric_{metric}") for metric in agent_kpis], header=alt.Header(labelOrient='bottom'))
         ).resolve_scale(
             y='independent'
         )
         st.altair_chart(chart, use_container_width=True)
 
+# --- 覆蓋率分析的彙總：催員每日接通案件覆蓋率與回收金額 (依參數快取) ---
+@st.cache_data(max_entries=VIEW_CACHE_MAX_ENTRIES)
+def aggregate_coverage_daily(_views, version, group, month):
+    daily_summary = _views.slice_month(group, month)[AGENT_DAY_KEYS + ['Cases_on_Hand', 'Daily_Received_Amount', 'Total_Success_Case']]
+
+    daily_summary['Connected_Coverage'] = np.where(
+        daily_summary['Cases_on_Hand'] > 0,
+        daily_summary['Total_Success_Case'] / daily_summary['Cases_on_Hand'],
+        0
+    )
+
+    daily_summary.dropna(subset=['Daily_Received_Amount'], inplace=True)
+    return daily_summary
+
 # --- V18.2 修改：覆蓋率與績效關聯分析視圖 ---
-def display_coverage_performance_view(df, selected_group):
+def display_coverage_performance_view(views, selected_group):
     st.header(get_text("coverage_view_header"))
 
-    if selected_group != get_text("all_teams"):
-        df = df[df['Group'] == selected_group].copy()
+    group = group_key(selected_group)
 
     # --- 過濾器 ---
     if 'coverage_benchmark_select' not in st.session_state:
@@ -1223,7 +1959,7 @@ def display_coverage_performance_view(df, selected_group):
 
     col1, col2, col3 = st.columns(3)
     with col1:
-        available_months = sorted(df['Date'].dt.to_period('M').unique(), reverse=True)
+        available_months = views.months(group)[::-1]
         if not available_months:
             st.info(get_text("monthly_view_no_month_data"))
             return
@@ -1234,7 +1970,7 @@ def display_coverage_performance_view(df, selected_group):
             key="coverage_month_select"
         )
 
-    df_month = df[df['Date'].dt.to_period('M') == selected_month_period].copy()
+    df_month = views.slice_month(group, selected_month_period)
     if df_month.empty:
         st.info(get_text("monthly_view_no_data_for_month"))
         return
@@ -1262,25 +1998,8 @@ def display_coverage_performance_view(df, selected_group):
             key="coverage_benchmark_select"
         )
 
-    # --- 數據準備 ---
-    daily_summary = df_month.groupby(['Date', 'Group', 'Agent ID', 'Agent Name']).agg(
-        Cases_on_Hand=('Cases on Hand', 'first'),
-        Daily_Received_Amount=('Daily Received Amount', 'first')
-    ).reset_index()
-
-    success_cases = df_month[df_month['Connected'] == 1].groupby(['Date', 'Agent ID'])['Case No'].nunique().reset_index()
-    success_cases.rename(columns={'Case No': 'Total_Success_Case'}, inplace=True)
-
-    daily_summary = pd.merge(daily_summary, success_cases, on=['Date', 'Agent ID'], how='left')
-    daily_summary['Total_Success_Case'] = daily_summary['Total_Success_Case'].fillna(0).astype(int)
-
-    daily_summary['Connected_Coverage'] = np.where(
-        daily_summary['Cases_on_Hand'] > 0,
-        daily_summary['Total_Success_Case'] / daily_summary['Cases_on_Hand'],
-        0
-    )
-
-    daily_summary.dropna(subset=['Daily_Received_Amount'], inplace=True)
+    # --- 數據準備 (催員每日指標表已含所需欄位) ---
+    daily_summary = aggregate_coverage_daily(views, views.version, group, selected_month_period)
     
     # --- V18.2 修改：只篩選被選中的人員 ---
     agents_to_display = [selected_agent] + benchmark_agents
@@ -1399,12 +2118,23 @@ def main():
 
     st.title(get_text("main_title"))
 
-    # 注意：請將此路徑修改為您本機存放 consolidated_report_enriched.csv 的實際路徑
-    local_csv_path = r"C:\Users\KH00002\電催過程指標追蹤\consolidated_report_enriched.csv"
-    df = load_data(local_csv_path)
+    # 注意：請將此路徑修改為您本機存放 ETL 輸出資料集 (consolidated_report_enriched 資料夾) 的實際路徑；
+    # 若指向舊版 consolidated_report_enriched.csv 檔案，仍會以 CSV 方式讀取
+    local_data_path = r"C:\Users\KH00002\電催過程指標追蹤\consolidated_report_enriched"
+    refresher = get_dataset_refresher(local_data_path)
+    data_version = refresher.current_version()
+    if refresher.loaded:
+        st.success(get_text("load_data_local_success").format(path=local_data_path))
+        cube = load_agent_day_cube(local_data_path, data_version)
+        views = load_group_views(local_data_path, data_version)
+    else:
+        cube = views = None
+        error = refresher.error
+        if error is not None:
+            show_load_error(error, local_data_path)
     thresholds = load_thresholds("各組每日撥通數上下限.xlsx")
 
-    if df is not None:
+    if cube is not None:
         st.sidebar.header(get_text("sidebar_view_mode"))
 
         view_mode_options = get_text("view_modes")
@@ -1431,9 +2161,9 @@ def main():
         }
 
         st.sidebar.header(get_text("sidebar_filter_team"))
-        if 'Group' in df.columns:
-            df['Group'] = df['Group'].astype(str)
-            all_groups = [get_text("all_teams")] + [g for g in CUSTOM_GROUP_ORDER if g in df['Group'].unique()]
+        if 'Group' in cube.columns:
+            available_groups = set(cube['Group'].astype(str).unique())
+            all_groups = [get_text("all_teams")] + [g for g in CUSTOM_GROUP_ORDER if g in available_groups]
         else:
             all_groups = [get_text("all_teams")]
 
@@ -1451,11 +2181,51 @@ def main():
             key="group_select"
         )
 
+        st.sidebar.divider()
+        data_time = refresher.data_time.strftime('%Y-%m-%d %H:%M') if refresher.data_time is not None else "-"
+        st.sidebar.caption(get_text("sidebar_data_time").format(time=data_time))
+        st.sidebar.caption(get_text("sidebar_data_version").format(version=data_version))
+        if refresher.pending_version is not None:
+            st.sidebar.info(get_text("sidebar_refresh_status_pending").format(version=refresher.pending_version))
+        elif refresher.failed_version is not None:
+            st.sidebar.warning(get_text("sidebar_refresh_status_failed").format(version=refresher.failed_version))
+            error = refresher.error
+            if error is not None:
+                show_load_error(error, local_data_path, container=st.sidebar)
+        elif refresher.checked_at is not None:
+            st.sidebar.caption(get_text("sidebar_refresh_status_current").format(time=refresher.checked_at.strftime('%H:%M:%S')))
+        if WARMUP_VIEWS and refresher.warmup_seconds is not None:
+            st.sidebar.caption(get_text("sidebar_warmup_time").format(seconds=refresher.warmup_seconds))
+        if st.sidebar.button(get_text("sidebar_refresh_data"), key="refresh_data_button"):
+            refresher.request_check()
+
         if view_mode in view_functions:
             if view_mode in [view_mode_options[0], view_mode_options[1]]:
-                 view_functions[view_mode](df, selected_group, thresholds)
+                 view_functions[view_mode](views, selected_group, thresholds)
+            elif view_mode == view_mode_options[5]:
+                 view_functions[view_mode](views, selected_group)
+            elif view_mode == view_mode_options[2]:
+                 view_functions[view_mode](views, selected_group, load_talk_views(local_data_path, data_version))
+            elif view_mode == view_mode_options[3]:
+                 view_functions[view_mode](views, selected_group, load_minute_views(local_data_path, data_version))
             else:
-                 view_functions[view_mode](df, selected_group)
+                 # 個人剖析的時段分佈與接通案件數需要逐通話明細，由視圖依選定月份按需載入
+                 month_loader = partial(load_month_calls, local_data_path, data_version)
+                 view_functions[view_mode](views, selected_group, month_loader, load_talk_views(local_data_path, data_version))
+
+        # 管理面板：放在視圖之後，才包含本次執行中按需載入的月分區
+        with st.sidebar.expander(get_text("sidebar_memory_report")):
+            memory_reports = get_memory_reports()
+            if not memory_reports:
+                st.caption(get_text("memory_report_empty"))
+            for table_name, report in sorted(memory_reports.items()):
+                st.markdown(f"**{table_name}**")
+                before_col, after_col, saved_col = get_text("memory_report_columns")[1:]
+                st.dataframe(
+                    memory_report_table(report).style.format({before_col: '{:,.2f}', after_col: '{:,.2f}', saved_col: '{:.0%}'}),
+                    hide_index=True, use_container_width=True
+                )
+            st.caption(get_text("memory_report_partition_cache").format(used=get_partition_cache().used_bytes() / 1024 ** 2, budget=PARTITION_CACHE_BUDGET_MB))
 
     else:
         st.warning(get_text("data_load_failed"))
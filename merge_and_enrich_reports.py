@@ -1,8 +1,12 @@
 import os
 import pandas as pd
+import numpy as np
 import glob
 import traceback
 import re
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # --- 1. 路徑設定 ---
 source_directory = r"C:\Users\KH00002\電催過程指標追蹤\每日資料底稿"
@@ -12,30 +16,328 @@ kpi_source_directory = r"C:\Users\KH00002\電催過程指標追蹤\每日資料
 output_filename = "consolidated_report_enriched.csv"
 output_path = os.path.join(output_directory, output_filename)
 
-# --- 2. 函數：處理前端通話紀錄 (邏輯不變) ---
-def process_call_logs(source_dir, group_file):
-    """整合每日通話紀錄 Excel 檔案，並匹配團隊與催員姓名。"""
+# --- 輸出設定 ---
+# 主要輸出為依月份分區的 Parquet 資料集 (calls_YYYY-MM.parquet)，供儀表板直接讀取；
+# partition_by_group 為 True 時再依組別細分。write_legacy_csv 保留舊版單一 CSV 輸出以利過渡。
+output_dataset_directory = os.path.join(output_directory, "consolidated_report_enriched")
+partition_by_group = False
+write_legacy_csv = False
+# 類別欄位以字典編碼寫出 (整數代碼 + 一份字串字典)；Case No 的不重複計數直接在代碼上進行
+CATEGORICAL_OUTPUT_COLUMNS = ['Group', 'Agent ID', 'Agent Name', 'Case No']
+# 預先彙總的「催員 x 日」指標表，儀表板的每日/月度/覆蓋率視圖直接讀取，不必再對通話明細分組
+agent_day_cube_filename = "agent_day_cube.parquet"
+AGENT_DAY_KEYS = ['Date', 'Group', 'Agent ID', 'Agent Name']
+# 在手案件數與當日回收金額是「催員 x 日」層級的數值，獨立存成 KPI 維度表，不再重複寫在每一筆通話上
+agent_day_kpi_filename = "agent_day_kpi.parquet"
+AGENT_DAY_KPI_KEYS = ['Date', 'Agent ID']
+AGENT_DAY_KPI_COLUMNS = ['Cases on Hand', 'Daily Received Amount']
+# 每位催員每日「一天中第幾分鐘」(0-1439) 的撥打數、接通數與回收金額，只存有撥打的分鐘；
+# 儀表板的時點分析以相鄰分鐘加總出任意時段粒度，不必再逐通話分組
+agent_minute_histogram_filename = "agent_minute_histogram.parquet"
+MINUTE_HISTOGRAM_COLUMNS = ['Minute', 'Calls', 'Connected_Calls', 'Received_Amount']
+# 每位催員每日的通話時長直方圖：Talk_Seconds 為每格的上界秒數 (解析度 talk_histogram_resolution_seconds)，
+# 超過 talk_histogram_max_seconds 的通話全部歸入上界為 max + 解析度的溢位格；只存有通話的格子。
+# 儀表板依任意區間上界 (須為解析度的倍數且不超過上限) 加總出通話時長分佈，不必再逐通話分類
+agent_talk_histogram_filename = "agent_talk_histogram.parquet"
+talk_histogram_resolution_seconds = 1
+talk_histogram_max_seconds = 600
+TALK_HISTOGRAM_COLUMNS = ['Talk_Seconds', 'Calls', 'Recovered_Calls']
+# 通話表與指標表依日期排序寫出，儀表板的日曆索引可直接以連續列範圍切片
+CALENDAR_SORT_KEYS = ['Date', 'Group', 'Agent ID']
+CALL_FACT_COLUMNS = [
+    'Date', 'Group', 'Agent ID', 'Agent Name', 'Case No', 'Connected',
+    'Talk Durations', 'Call Assigned'
+]
+
+# --- 增量處理快取設定 ---
+# 每個來源檔案的解析結果會以「單日中間檔」形式保存，並以 manifest 記錄檔案指紋；
+# 只有新增或內容變更的檔案才會重新解析。修改單檔處理邏輯後，請遞增 ETL_CACHE_VERSION 以強制重算。
+ETL_CACHE_VERSION = 3
+cache_directory = os.path.join(output_directory, "etl_cache")
+manifest_path = os.path.join(cache_directory, "source_manifest.json")
+
+# --- Excel 解析快取 (bronze) ---
+# openpyxl 解析 .xlsx 是 ETL 最慢的步驟。每份來源 Excel 第一次解析後，會以內容雜湊為鍵存成 Parquet，
+# 放在來源檔旁的 _bronze 資料夾；之後 (包含 ETL_CACHE_VERSION 遞增後的重算) 直接讀取 Parquet。
+use_bronze_cache = True
+bronze_directory_name = "_bronze"
+
+# --- 平行解析設定 ---
+# 通話紀錄 Excel 的解析為 CPU 密集工作，預設使用全部核心；設為 1 即退回逐檔循序解析。
+call_log_workers = os.cpu_count() or 1
+
+# --- 輔助函數：來源檔案 manifest 與單日中間檔 ---
+def compute_file_hash(path, chunk_size=1024 * 1024):
+    """以 SHA-256 計算檔案內容指紋。"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    """讀取來源檔案 manifest；版本不符或檔案損毀時回傳空白清單 (即全部重算)。"""
+    empty_manifest = {'version': ETL_CACHE_VERSION, 'files': {}}
+    if not os.path.exists(path):
+        return empty_manifest
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError) as e:
+        print(f"警告：無法讀取 manifest ({e})，將重新處理所有來源檔案。")
+        return empty_manifest
+    if manifest.get('version') != ETL_CACHE_VERSION:
+        print("偵測到 ETL 處理邏輯版本變更，將重新處理所有來源檔案。")
+        return empty_manifest
+    manifest.setdefault('files', {})
+    return manifest
+
+
+def save_manifest(manifest, path):
+    """以「寫入暫存檔後置換」的方式保存 manifest，避免中斷時留下半份檔案。"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def refresh_manifest_entry(manifest, path):
+    """
+    更新單一來源檔案的指紋，回傳 (entry, is_changed)。
+    大小與修改時間皆未變時直接沿用舊紀錄；否則重新計算雜湊，內容相同者仍視為未變更。
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(path)
+    previous = manifest['files'].get(key)
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime') == stat.st_mtime:
+        return previous, False
+
+    content_hash = compute_file_hash(path)
+    is_changed = not previous or previous.get('hash') != content_hash
+    entry = {
+        'path': key,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'hash': content_hash,
+        'rows': {} if is_changed else previous.get('rows', {}),
+    }
+    manifest['files'][key] = entry
+    return entry, is_changed
+
+
+def forget_manifest_entry(manifest, path):
+    """移除單一來源檔案的紀錄；解析失敗時呼叫，下次執行會視為新檔案重新解析，不會沿用舊版本的中間檔。"""
+    manifest['files'].pop(os.path.abspath(path), None)
+
+
+def prune_manifest(manifest, existing_paths):
+    """移除已不存在於來源目錄的檔案紀錄。"""
+    existing_keys = {os.path.abspath(p) for p in existing_paths}
+    for key in list(manifest['files']):
+        if key not in existing_keys:
+            del manifest['files'][key]
+
+
+def cache_piece_path(kind, key):
+    """回傳單日中間檔的路徑，例如 etl_cache/calls/20251010.pkl。"""
+    return os.path.join(cache_directory, kind, f"{key}.pkl")
+
+
+def load_cached_piece(kind, key):
+    """讀取單日中間檔；不存在或讀取失敗時回傳 None。"""
+    path = cache_piece_path(kind, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception as e:
+        print(f"警告：中間檔 {path} 無法讀取 ({e})，將重新解析來源檔案。")
+        return None
+
+
+def save_cached_piece(df, kind, key):
+    """保存單日中間檔。"""
+    path = cache_piece_path(kind, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+# --- 輔助函數：Excel bronze 快取 ---
+def bronze_path(source_path, content_hash, read_options):
+    """bronze 檔路徑，例如 _bronze/Report_Outbound_CTD_20251010.3f2a9c1d4e5b6a70.1c2d3e4f.parquet。"""
+    options_key = hashlib.sha256(json.dumps(read_options, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    bronze_dir = os.path.join(os.path.dirname(source_path), bronze_directory_name)
+    return os.path.join(bronze_dir, f"{stem}.{content_hash[:16]}.{options_key}.parquet")
+
+
+def _to_bronze_frame(df):
+    """Excel 常見同欄混雜數字與文字；這類欄位的非空值轉為字串，其餘欄位保留原型別寫入 Parquet。"""
+    import pyarrow as pa
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def read_excel_bronze(path, content_hash=None, **read_options):
+    """
+    以 bronze 快取讀取 Excel：內容雜湊與讀取參數皆相同時直接讀 Parquet，否則解析 Excel 後寫入快取，
+    並移除同一來源檔的舊版 bronze。快取寫入失敗不影響本次結果。
+    """
+    if not use_bronze_cache:
+        return pd.read_excel(path, **read_options)
+    if content_hash is None:
+        content_hash = compute_file_hash(path)
+    cached_path = bronze_path(path, content_hash, read_options)
+    if os.path.exists(cached_path):
+        try:
+            return pd.read_parquet(cached_path)
+        except Exception as e:
+            print(f"警告：bronze 快取 {cached_path} 無法讀取 ({e})，將重新解析 Excel。")
+
+    df = pd.read_excel(path, **read_options)
+    try:
+        bronze_df = _to_bronze_frame(df)
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+        tmp_path = f"{cached_path}.{os.getpid()}.tmp"
+        bronze_df.to_parquet(tmp_path, index=False, compression='zstd')
+        os.replace(tmp_path, cached_path)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for stale_path in glob.glob(os.path.join(os.path.dirname(cached_path), f"{glob.escape(stem)}.*.parquet")):
+            if stale_path != cached_path:
+                os.remove(stale_path)
+        # 以快取內容回傳，確保首次解析與之後讀取快取的結果一致
+        return bronze_df
+    except Exception as e:
+        print(f"警告：無法寫入 bronze 快取 ({e})，本次直接使用 Excel 解析結果。")
+        return df
+
+
+# --- 2. 函數：處理前端通話紀錄 ---
+def read_call_log_file(path, content_hash=None):
+    """解析單一 Report_Outbound_CTD_*.xlsx 通話紀錄 (尚未匹配組別)，原始表格經由 bronze 快取讀取。"""
+    df = read_excel_bronze(path, content_hash=content_hash, skiprows=9)
+    df.columns = df.columns.str.strip()
+    filename = os.path.basename(path)
+    date_str = filename[20:-5]
+    df['Date'] = pd.to_datetime(date_str, format='%Y%m%d')
+    df['Talk Durations'] = pd.to_timedelta(df['Talk Durations'].fillna('00:00:00'), errors='coerce')
+    df['Connected'] = (df['Call Status'] == 'Success').astype(int)
+    return df
+
+
+def _parse_call_log_worker(path, content_hash=None):
+    """平行解析用的工作函數；錯誤以字串回傳，避免單一壞檔中斷整個處理池。"""
+    try:
+        return path, read_call_log_file(path, content_hash), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def parse_call_log_files(paths, workers=1, content_hashes=None):
+    """
+    解析多個通話紀錄檔案，回傳 {path: DataFrame}；解析失敗的檔案會列印錯誤並略過。
+    workers 大於 1 時以多個行程平行解析。content_hashes 可提供已算好的檔案雜湊 (供 bronze 快取使用)。
+    """
+    results = {}
+    content_hashes = content_hashes or {}
+    if workers > 1 and len(paths) > 1:
+        retry_paths = []
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+            futures = {executor.submit(_parse_call_log_worker, path, content_hashes.get(path)): path for path in paths}
+            for future in as_completed(futures):
+                try:
+                    path, df, error = future.result()
+                except Exception:
+                    # 工作行程意外終止 (例如記憶體不足或 Excel 解析器崩潰) 時整個處理池失效，尚未完成的檔案稍後逐一重試
+                    retry_paths.append(futures[future])
+                    continue
+                if error is not None:
+                    print(f"處理檔案 {os.path.basename(path)} 時發生錯誤: {error}")
+                    continue
+                results[path] = df
+        # 每個檔案各用一個新的單一行程重試，造成崩潰的檔案只會讓自己失敗並被略過，不會中斷 ETL
+        if retry_paths:
+            print(f"警告：平行解析的工作行程意外終止，{len(retry_paths)} 個檔案將逐一重試。")
+        for path in sorted(retry_paths, key=os.path.basename):
+            try:
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    path, df, error = executor.submit(_parse_call_log_worker, path, content_hashes.get(path)).result()
+            except Exception as e:
+                error = f"工作行程失敗: {e!r}"
+            if error is not None:
+                print(f"處理檔案 {os.path.basename(path)} 時發生錯誤，已略過: {error}")
+                continue
+            results[path] = df
+    else:
+        for path in paths:
+            path, df, error = _parse_call_log_worker(path, content_hashes.get(path))
+            if error is not None:
+                print(f"處理檔案 {os.path.basename(path)} 時發生錯誤: {error}")
+                continue
+            results[path] = df
+    return results
+
+
+def process_call_logs(source_dir, group_file, manifest=None, workers=None):
+    """
+    整合每日通話紀錄 Excel 檔案，並匹配團隊與催員姓名。
+    提供 manifest 時，只重新解析新增或變更的檔案，其餘直接讀取單日中間檔；
+    需解析的檔案依 workers (預設 call_log_workers) 平行處理，輸出固定依日期排序。
+    """
     print("開始處理前端通話紀錄...")
     file_pattern = os.path.join(source_dir, "Report_Outbound_CTD_*.xlsx")
-    file_paths = glob.glob(file_pattern)
+    # 依檔名 (即日期) 排序，確保輸出順序不受檔案系統或平行完成順序影響
+    file_paths = sorted(glob.glob(file_pattern), key=os.path.basename)
     if not file_paths:
         print("警告：在指定目錄下找不到任何 'Report_Outbound_CTD_*.xlsx' 檔案。")
         return pd.DataFrame()
+    if workers is None:
+        workers = call_log_workers
 
-    all_data = []
+    pieces = {}
+    entries = {}
+    paths_to_parse = []
     for path in file_paths:
-        try:
-            df = pd.read_excel(path, skiprows=9)
-            df.columns = df.columns.str.strip()
-            filename = os.path.basename(path)
-            date_str = filename[20:-5]
-            df['Date'] = pd.to_datetime(date_str, format='%Y%m%d')
-            df['Talk Durations'] = pd.to_timedelta(df['Talk Durations'].fillna('00:00:00'), errors='coerce')
-            df['Connected'] = (df['Call Status'] == 'Success').astype(int)
-            all_data.append(df)
-        except Exception as e:
-            print(f"處理檔案 {os.path.basename(path)} 時發生錯誤: {e}")
-            continue
+        piece_key = os.path.basename(path)[20:-5]
+        if manifest is not None:
+            try:
+                entry, is_changed = refresh_manifest_entry(manifest, path)
+            except OSError as e:
+                print(f"處理檔案 {os.path.basename(path)} 時發生錯誤: {e}")
+                continue
+            entries[path] = entry
+            if not is_changed:
+                df = load_cached_piece('calls', piece_key)
+                if df is not None:
+                    pieces[path] = df
+                    continue
+        paths_to_parse.append(path)
+
+    if paths_to_parse:
+        print(f"需解析 {len(paths_to_parse)} 個通話紀錄檔案 (平行行程數: {min(workers, len(paths_to_parse))})...")
+    content_hashes = {path: entry['hash'] for path, entry in entries.items()}
+    parsed = parse_call_log_files(paths_to_parse, workers=workers, content_hashes=content_hashes)
+    for path, df in parsed.items():
+        if manifest is not None:
+            save_cached_piece(df, 'calls', os.path.basename(path)[20:-5])
+            entries[path]['rows'] = {'calls': len(df)}
+        pieces[path] = df
+    if manifest is not None:
+        for path in paths_to_parse:
+            if path not in parsed:
+                forget_manifest_entry(manifest, path)
+
+    print(f"通話紀錄：共 {len(file_paths)} 個檔案，重新解析 {len(parsed)} 個，其餘沿用中間檔。")
+    all_data = [pieces[path] for path in file_paths if path in pieces]
 
     if not all_data:
         print("錯誤：所有通話紀錄檔案都處理失敗。")
@@ -63,96 +365,199 @@ def process_call_logs(source_dir, group_file):
         return pd.DataFrame()
 
 # --- 3. 【重大升級】兼容多格式的單日績效檔案處理函數 ---
-def process_daily_kpi_file(kpi_file_path, report_date):
+# 績效底稿只需要以下欄位；CSV 以欄位投影 + 明確型別分塊讀取，記憶體用量不隨檔案大小成長。
+KPI_SOURCE_COLUMNS = ['USR_ID', 'ASSIGN_AMT', 'TMRENT_TAR', 'ASSIGN_YMD', 'REMOVE_YMD', 'RCV_DT', 'RCV_AMT_ACTUAL']
+KPI_CSV_DTYPES = {
+    'USR_ID': str,
+    'ASSIGN_AMT': 'float64',
+    'TMRENT_TAR': 'float64',
+    'ASSIGN_YMD': str,
+    'REMOVE_YMD': str,
+    'RCV_DT': str,
+    'RCV_AMT_ACTUAL': str,
+}
+kpi_csv_chunksize = 200_000
+# 沒有自己績效底稿的通話日期，是否以鄰近日期的底稿派件區間推算在手案件數
+fill_cases_for_missing_kpi_dates = True
+
+
+def iter_kpi_chunks(kpi_file_path, content_hash=None):
+    """逐塊讀取績效底稿，每塊皆已統一為 KPI_SOURCE_COLUMNS 的欄位名稱。"""
+    if kpi_file_path.endswith('.xlsx'):
+        # openpyxl 無法分塊讀取，Excel 版底稿整份視為單一區塊，並經由 bronze 快取讀取
+        df_kpi_full = read_excel_bronze(kpi_file_path, content_hash=content_hash, skiprows=1, header=1)
+        column_mapping = {
+            '資料日期\nDATA DATE': 'DATA_DATE',
+            '催員編號\nCOLLECTOR ID': 'USR_ID',
+            '逾期金額\nOVERDUE AMOUNT': 'ASSIGN_AMT',
+            '派件日期\nASSIGN DATE': 'ASSIGN_YMD',
+            '移出日期\nSHIFT OUT DATE': 'REMOVE_YMD',
+            '回推/回收日期\nRECEIVABLE DATE': 'RCV_DT',
+            '實際回收金額\nACTUAL RECOVERY AMOUNT': 'RCV_AMT_ACTUAL'
+        }
+        df_kpi_full.rename(columns=column_mapping, inplace=True)
+        if 'TMRENT_TAR' not in df_kpi_full.columns:
+            df_kpi_full['TMRENT_TAR'] = 0
+        yield df_kpi_full[[col for col in KPI_SOURCE_COLUMNS if col in df_kpi_full.columns]]
+    else:
+        yield from pd.read_csv(
+            kpi_file_path,
+            usecols=lambda col: col in KPI_SOURCE_COLUMNS,
+            dtype=KPI_CSV_DTYPES,
+            chunksize=kpi_csv_chunksize
+        )
+
+
+def _add_series(total, addition):
+    """累加兩個以 Agent ID 為索引的 Series。"""
+    if total is None:
+        return addition
+    return total.add(addition, fill_value=0)
+
+
+def process_daily_kpi_file(kpi_file_path, report_date, content_hash=None):
     """
-    讀取單一績效底稿，並根據精準的業務邏輯計算「金額摘要」與「在手案件數」。
+    讀取單一績效底稿，計算「金額摘要」，並整理出供在手案件數計算用的「派件區間事件」。
+    底稿逐塊讀取，各催員的分配金額、當日回收金額與區間事件皆跨區塊累加。
     """
     try:
-        df_kpi_full = pd.DataFrame()
-        # --- Part 1: 智能讀取檔案 ---
-        if kpi_file_path.endswith('.xlsx'):
-            df_kpi_full = pd.read_excel(kpi_file_path, skiprows=1, header=1)
-            column_mapping = {
-                '資料日期\nDATA DATE': 'DATA_DATE',
-                '催員編號\nCOLLECTOR ID': 'USR_ID',
-                '逾期金額\nOVERDUE AMOUNT': 'ASSIGN_AMT',
-                '派件日期\nASSIGN DATE': 'ASSIGN_YMD',
-                '移出日期\nSHIFT OUT DATE': 'REMOVE_YMD',
-                '回推/回收日期\nRECEIVABLE DATE': 'RCV_DT',
-                '實際回收金額\nACTUAL RECOVERY AMOUNT': 'RCV_AMT_ACTUAL'
-            }
-            df_kpi_full.rename(columns=column_mapping, inplace=True)
-            if 'TMRENT_TAR' not in df_kpi_full.columns:
-                df_kpi_full['TMRENT_TAR'] = 0
-        else:
-            df_kpi_full = pd.read_csv(kpi_file_path, low_memory=False)
-
-        # --- Part 2: 計算金額摘要 (採用新邏輯) ---
-        
-        # 獲取當天所有催員的列表，作為合併的基礎
-        all_agents_today = pd.DataFrame(df_kpi_full['USR_ID'].unique(), columns=['Agent ID'])
-        all_agents_today['Agent ID'] = all_agents_today['Agent ID'].astype(str).str.strip()
-        
-        # 2a. 精準計算當日回收金額
-        daily_received_summary = pd.DataFrame()
-        if 'RCV_DT' in df_kpi_full.columns and 'RCV_AMT_ACTUAL' in df_kpi_full.columns:
-            df_kpi_full['RCV_DT'] = pd.to_datetime(df_kpi_full['RCV_DT'], errors='coerce')
-            df_kpi_full['RCV_AMT_ACTUAL'] = pd.to_numeric(
-                df_kpi_full['RCV_AMT_ACTUAL'].astype(str).str.replace(',', ''), errors='coerce'
-            ).fillna(0)
-            
-            # 核心篩選邏輯：只選擇回收日期為報告日期的紀錄
-            recoveries_today = df_kpi_full[df_kpi_full['RCV_DT'].dt.date == report_date.date()].copy()
-            
-            if not recoveries_today.empty:
-                daily_received_summary = recoveries_today.groupby('USR_ID')['RCV_AMT_ACTUAL'].sum().reset_index()
-                daily_received_summary.rename(columns={'USR_ID': 'Agent ID', 'RCV_AMT_ACTUAL': 'Daily Received Amount'}, inplace=True)
-                daily_received_summary['Agent ID'] = daily_received_summary['Agent ID'].astype(str).str.strip()
-
-        # 2b. 計算其他指標 (如分配金額、目標等)
-        other_metrics = df_kpi_full.groupby('USR_ID').agg(
-            ASSIGN_AMT=('ASSIGN_AMT', 'sum'),
-            TMRENT_TAR=('TMRENT_TAR', 'first')
-        ).reset_index()
-        other_metrics.rename(columns={'USR_ID': 'Agent ID', 'ASSIGN_AMT': 'Daily Assigned Amount', 'TMRENT_TAR': 'Target Amount'}, inplace=True)
-        other_metrics['Agent ID'] = other_metrics['Agent ID'].astype(str).str.strip()
-
-        # 2c. 合併所有金額指標
-        daily_amounts_summary = pd.merge(all_agents_today, other_metrics, on='Agent ID', how='left')
-        if not daily_received_summary.empty:
-            daily_amounts_summary = pd.merge(daily_amounts_summary, daily_received_summary, on='Agent ID', how='left')
-        
+        report_day = pd.Timestamp(report_date).normalize()
+        agent_order = {}
+        assigned_total = None
+        target_first = None
+        received_total = None
+        events_total = None
+        has_case_cols = True
+
+        for chunk in iter_kpi_chunks(kpi_file_path, content_hash):
+            if chunk.empty:
+                continue
+            agent_ids = chunk['USR_ID'].astype(str).str.strip()
+
+            # 當天所有催員的列表 (依首次出現順序)，作為合併的基礎
+            for agent_id in agent_ids.unique():
+                agent_order.setdefault(agent_id, len(agent_order))
+
+            # 分配金額加總與目標金額 (取第一筆)
+            assigned_total = _add_series(assigned_total, chunk['ASSIGN_AMT'].groupby(agent_ids).sum())
+            chunk_target = chunk['TMRENT_TAR'].groupby(agent_ids).first()
+            target_first = chunk_target if target_first is None else target_first.combine_first(chunk_target)
+
+            # 精準計算當日回收金額：只選擇回收日期為報告日期的紀錄
+            if 'RCV_DT' in chunk.columns and 'RCV_AMT_ACTUAL' in chunk.columns:
+                rcv_dates = pd.to_datetime(chunk['RCV_DT'], errors='coerce').dt.normalize()
+                rcv_amounts = pd.to_numeric(
+                    chunk['RCV_AMT_ACTUAL'].astype(str).str.replace(',', ''), errors='coerce'
+                ).fillna(0)
+                today_mask = rcv_dates == report_day
+                if today_mask.any():
+                    received_total = _add_series(
+                        received_total, rcv_amounts[today_mask].groupby(agent_ids[today_mask]).sum()
+                    )
+
+            # 派件區間事件：派件日 +1，移出日隔天 -1 (未移出者不產生結束事件，視為仍在手上)
+            if not all(col in chunk.columns for col in ['ASSIGN_YMD', 'REMOVE_YMD']):
+                has_case_cols = False
+                continue
+            events_total = _add_series(events_total, build_interval_events(
+                agent_ids,
+                pd.to_datetime(chunk['ASSIGN_YMD'], errors='coerce'),
+                pd.to_datetime(chunk['REMOVE_YMD'], errors='coerce')
+            ))
+
+        # --- 組合金額摘要 ---
+        all_agents_today = pd.Index(sorted(agent_order, key=agent_order.get), name='Agent ID')
+        empty_metric = pd.Series(dtype='float64')
+        daily_amounts_summary = pd.DataFrame({
+            'Daily Assigned Amount': (assigned_total if assigned_total is not None else empty_metric).reindex(all_agents_today),
+            'Target Amount': (target_first if target_first is not None else empty_metric).reindex(all_agents_today),
+            'Daily Received Amount': (received_total if received_total is not None else empty_metric).reindex(all_agents_today),
+        }).reset_index()
         daily_amounts_summary['Date'] = report_date
         daily_amounts_summary.fillna(0, inplace=True)
 
-        # --- Part 3: 計算在手案件數 (邏輯不變) ---
-        case_cols = ['USR_ID', 'ASSIGN_YMD', 'REMOVE_YMD']
-        if not all(col in df_kpi_full.columns for col in case_cols):
-            daily_cases_summary = pd.DataFrame()
+        # --- 組合派件區間事件 ---
+        if not has_case_cols or events_total is None:
+            interval_events = pd.DataFrame()
         else:
-            df_cases = df_kpi_full[case_cols].copy()
-            df_cases.rename(columns={'USR_ID': 'Agent ID'}, inplace=True)
-            df_cases['Agent ID'] = df_cases['Agent ID'].astype(str).str.strip()
-            df_cases['ASSIGN_YMD'] = pd.to_datetime(df_cases['ASSIGN_YMD'], errors='coerce')
-            df_cases['REMOVE_YMD'] = pd.to_datetime(df_cases['REMOVE_YMD'], errors='coerce')
-            
-            future_date = pd.to_datetime('2099-12-31')
-            df_cases['REMOVE_YMD'] = df_cases['REMOVE_YMD'].fillna(future_date)
-            df_cases.dropna(subset=['ASSIGN_YMD'], inplace=True)
-
-            active_mask = (df_cases['ASSIGN_YMD'] <= report_date) & (df_cases['REMOVE_YMD'] >= report_date)
-            active_cases_today = df_cases[active_mask]
-            
-            daily_cases_summary = active_cases_today.groupby('Agent ID').size().reset_index(name='Cases on Hand')
-            daily_cases_summary['Date'] = report_date
+            interval_events = events_total.astype(int).rename('Delta').reset_index()
         
-        return daily_amounts_summary, daily_cases_summary
+        return daily_amounts_summary, interval_events
 
     except Exception as e:
         print(f"處理績效檔案 {os.path.basename(kpi_file_path)} 時發生錯誤: {e}")
         return pd.DataFrame(), pd.DataFrame()
 
 
+# --- 3b. 在手案件數：派件區間掃描 ---
+def build_interval_events(agent_ids, assign_dates, remove_dates):
+    """
+    將派件區間 [ASSIGN_YMD, REMOVE_YMD] 轉為以 (Agent ID, Event Date) 為索引的增減量：
+    派件日 +1、移出日隔天 -1。移出日早於派件日的異常區間不計入。
+    """
+    assign_dates = assign_dates.dt.normalize()
+    remove_dates = remove_dates.dt.normalize()
+    valid = assign_dates.notna() & (remove_dates.isna() | (remove_dates >= assign_dates))
+    has_end = valid & remove_dates.notna()
+
+    starts = assign_dates[valid].groupby([agent_ids[valid], assign_dates[valid]]).size()
+    end_dates = remove_dates[has_end] + pd.Timedelta(days=1)
+    ends = -end_dates.groupby([agent_ids[has_end], end_dates]).size()
+
+    events = pd.concat([starts, ends])
+    events.index.names = ['Agent ID', 'Event Date']
+    return events.groupby(level=['Agent ID', 'Event Date']).sum()
+
+
+def sweep_cases_on_hand(interval_events, dates):
+    """
+    以一次排序 + 累加掃描，計算每位催員在 dates 中每一天的在手案件數，
+    回傳欄位為 Agent ID / Cases on Hand / Date，僅保留在手案件數大於 0 者。
+    dates 不需要有自己的績效底稿。
+    """
+    columns = ['Agent ID', 'Cases on Hand', 'Date']
+    if interval_events.empty or len(dates) == 0:
+        return pd.DataFrame(columns=columns)
+
+    events = interval_events.sort_values(['Agent ID', 'Event Date'])
+    events = events.assign(**{'Cases on Hand': events.groupby('Agent ID')['Delta'].cumsum()})
+    query_dates = pd.DatetimeIndex(pd.to_datetime(pd.Index(dates)).unique()).normalize().sort_values()
+
+    queries = pd.MultiIndex.from_product(
+        [events['Agent ID'].unique(), query_dates], names=['Agent ID', 'Date']
+    ).to_frame(index=False).sort_values('Date', kind='stable')
+    events = events.sort_values('Event Date', kind='stable')
+    queries['Date'] = queries['Date'].astype(events['Event Date'].dtype)
+
+    swept = pd.merge_asof(
+        queries, events[['Agent ID', 'Event Date', 'Cases on Hand']],
+        left_on='Date', right_on='Event Date', by='Agent ID', direction='backward'
+    )
+    swept = swept[swept['Cases on Hand'] > 0]
+    swept['Cases on Hand'] = swept['Cases on Hand'].astype(int)
+    return swept[columns].sort_values(['Date', 'Agent ID']).reset_index(drop=True)
+
+
+def assign_snapshot_dates(report_dates, snapshot_dates):
+    """
+    為每個通話日期指定用來推算在手案件數的績效底稿日期：有自己底稿者用自己；
+    否則優先取之後最近的一份 (後續底稿仍保有期間內已移出案件的區間)，沒有則取之前最近的一份。
+    回傳 {snapshot_date: [report_date, ...]}。
+    """
+    snapshots = sorted(snapshot_dates)
+    assignment = {}
+    for report_date in report_dates:
+        if report_date in snapshot_dates:
+            source = report_date
+        elif not fill_cases_for_missing_kpi_dates or not snapshots:
+            continue
+        else:
+            later = [d for d in snapshots if d > report_date]
+            source = later[0] if later else snapshots[-1]
+        assignment.setdefault(source, []).append(report_date)
+    return assignment
+
+
 # --- 輔助函數：從績效檔名解析日期 ---
 def extract_report_date_from_filename(filename):
     """從績效檔名取得日期，優先處理 9 碼格式 (YYYYMMMDD)，再回退到標準 8 碼。"""
@@ -192,15 +597,223 @@ def extract_report_date_from_filename(filename):
     return None
 
 
+# --- 輔助函數：輸出月分區 Parquet 資料集 ---
+def apply_output_dtypes(df):
+    """將最終報告轉為原生型別：時間戳、時間長度與類別欄位，避免儀表板端再從文字解析。"""
+    df = df.copy()
+    df['Date'] = pd.to_datetime(df['Date'])
+    if 'Call Assigned' in df.columns:
+        df['Call Assigned'] = pd.to_datetime(df['Call Assigned'], errors='coerce')
+    if 'Talk Durations' in df.columns:
+        df['Talk Durations'] = pd.to_timedelta(df['Talk Durations'], errors='coerce')
+    if 'Case No' in df.columns:
+        df['Case No'] = df['Case No'].astype(str)
+    if 'Connected' in df.columns:
+        df['Connected'] = df['Connected'].astype('int8')
+    for col in CATEGORICAL_OUTPUT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype('category')
+    return df
+
+
+def partition_filename(month_key, group_name=None):
+    """月分區檔名，例如 calls_2025-10.parquet 或 calls_2025-10__Motor_M1_Team1.parquet。"""
+    if group_name is None:
+        return f"calls_{month_key}.parquet"
+    safe_group = re.sub(r'[^0-9A-Za-z_-]+', '_', str(group_name)).strip('_')
+    return f"calls_{month_key}__{safe_group}.parquet"
+
+
+def write_month_partitions(df, dataset_dir, by_group=False):
+    """
+    將報告依月份 (及選擇性的組別) 寫成壓縮 Parquet 分區，並移除已不存在的舊分區。
+    回傳寫入的檔名清單。
+    """
+    os.makedirs(dataset_dir, exist_ok=True)
+    partition_keys = ['__month'] + (['Group'] if by_group else [])
+    df = df.assign(__month=df['Date'].dt.strftime('%Y-%m'))
+
+    written = []
+    for key, part in df.groupby(partition_keys, observed=True, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        filename = partition_filename(key[0], key[1] if by_group else None)
+        part_path = os.path.join(dataset_dir, filename)
+        tmp_path = f"{part_path}.tmp"
+        part.drop(columns='__month').to_parquet(tmp_path, index=False, compression='zstd')
+        os.replace(tmp_path, part_path)
+        written.append(filename)
+
+    for stale_path in glob.glob(os.path.join(dataset_dir, "calls_*.parquet")):
+        if os.path.basename(stale_path) not in written:
+            os.remove(stale_path)
+    return written
+
+
+def build_agent_day_kpi(df_calls, df_amounts, df_cases_on_hand):
+    """
+    建立 KPI 維度表：每個有通話的 (日期, 催員) 一列，附上當日回收金額與在手案件數。
+    找不到績效資料的催員日補 0，與舊版逐通話合併後的結果一致。
+    """
+    kpi = df_calls[AGENT_DAY_KPI_KEYS].drop_duplicates().reset_index(drop=True)
+    for df_daily_kpi in (df_amounts, df_cases_on_hand):
+        if df_daily_kpi is not None and not df_daily_kpi.empty:
+            kpi = pd.merge(kpi, df_daily_kpi, on=AGENT_DAY_KPI_KEYS, how='left')
+    for col in AGENT_DAY_KPI_COLUMNS:
+        kpi[col] = kpi[col].fillna(0) if col in kpi.columns else 0
+    kpi['Cases on Hand'] = kpi['Cases on Hand'].astype('int64')
+    return kpi[AGENT_DAY_KPI_KEYS + AGENT_DAY_KPI_COLUMNS]
+
+
+def key_codes(values):
+    """欄位的整數代碼：類別欄位直接取其代碼，其餘以 pd.factorize 編碼；缺值為 -1。"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype('int64')
+    return pd.factorize(values)[0].astype('int64')
+
+
+def grouped_distinct_count(group_ids, codes, n_groups):
+    """
+    各組內不重複代碼數 (取代字串欄位的 groupby nunique)：將 (組別編號, 代碼) 合成單一 int64 鍵，
+    排序後只留每段相同鍵的第一筆，再依組別計數。組別編號或代碼為 -1 (缺值) 的列不計。
+    """
+    valid = (group_ids >= 0) & (codes >= 0)
+    width = int(codes[valid].max()) + 1 if valid.any() else 1
+    pairs = np.sort(group_ids[valid] * width + codes[valid])
+    first_seen = np.concatenate(([True], pairs[1:] != pairs[:-1])) if len(pairs) else np.zeros(0, dtype=bool)
+    return np.bincount(pairs[first_seen] // width, minlength=n_groups)
+
+
+def build_agent_day_cube(df_calls, df_kpi):
+    """
+    將通話明細彙總為每位催員每日一列的指標表：撥打數、接通數、處理案件數、
+    成功案件數、通話總時長，再併入 KPI 維度表的在手案件數與回收金額。
+    """
+    df = df_calls.assign(Connected=df_calls['Connected'].astype('int64'))
+    grouped = df.groupby(AGENT_DAY_KEYS, observed=True)
+    cube = grouped.agg(
+        Total_Outbound_Call=('Connected', 'size'),
+        Total_Outbound_Call_Success=('Connected', 'sum'),
+        Total_Talk_Duration=('Talk Durations', 'sum')
+    ).reset_index()
+
+    # 處理案件數與成功 (接通) 案件數：在 Case No 的整數代碼上計算各催員每日的不重複數
+    group_ids = grouped.ngroup().fillna(-1).to_numpy().astype('int64')
+    case_codes = key_codes(df['Case No'])
+    cube['Total_Case_call'] = grouped_distinct_count(group_ids, case_codes, len(cube))
+    cube['Total_Success_Case'] = grouped_distinct_count(group_ids, np.where(df['Connected'].to_numpy() == 1, case_codes, -1), len(cube))
+    cube = cube[AGENT_DAY_KEYS + ['Total_Outbound_Call', 'Total_Outbound_Call_Success', 'Total_Case_call', 'Total_Success_Case', 'Total_Talk_Duration']]
+
+    kpi = df_kpi.rename(columns={'Cases on Hand': 'Cases_on_Hand', 'Daily Received Amount': 'Daily_Received_Amount'})
+    kpi = kpi.astype({'Agent ID': str})
+    cube = pd.merge(cube.astype({'Agent ID': str}), kpi, on=AGENT_DAY_KPI_KEYS, how='left')
+    cube[['Cases_on_Hand', 'Daily_Received_Amount']] = cube[['Cases_on_Hand', 'Daily_Received_Amount']].fillna(0)
+    return apply_output_dtypes(cube)
+
+
+def build_agent_minute_histogram(df_calls, df_kpi):
+    """
+    將通話明細彙總為每位催員每日每分鐘一列的直方圖：撥打數、接通數，以及回收金額
+    (與時點分析相同，每通電話歸屬該催員當日的回收金額)。沒有撥打時間的通話不列入。
+    """
+    df = df_calls.loc[df_calls['Call Assigned'].notna(), AGENT_DAY_KEYS + ['Connected', 'Call Assigned']]
+    df = df.assign(
+        Minute=(df['Call Assigned'].dt.hour * 60 + df['Call Assigned'].dt.minute).astype('int16'),
+        Connected=df['Connected'].astype('int64')
+    )
+    histogram = df.groupby(AGENT_DAY_KEYS + ['Minute'], observed=True).agg(
+        Calls=('Connected', 'size'),
+        Connected_Calls=('Connected', 'sum')
+    ).reset_index()
+
+    amounts = df_kpi[AGENT_DAY_KPI_KEYS + ['Daily Received Amount']].astype({'Agent ID': str})
+    histogram = pd.merge(histogram.astype({'Agent ID': str}), amounts, on=AGENT_DAY_KPI_KEYS, how='left')
+    histogram['Received_Amount'] = histogram['Calls'] * histogram['Daily Received Amount'].fillna(0)
+    histogram = histogram.astype({'Calls': 'int32', 'Connected_Calls': 'int32'})
+    return apply_output_dtypes(histogram[AGENT_DAY_KEYS + MINUTE_HISTOGRAM_COLUMNS])
+
+
+def build_agent_talk_histogram(df_calls, df_kpi):
+    """
+    將有通話時長的通話彙總為每位催員每日每個時長格一列的直方圖：通話數，
+    以及其中發生在當日有回收的通話數 (供行為分析的回收轉換率)。
+    """
+    df = df_calls.loc[df_calls['Talk Durations'].dt.total_seconds() > 0, AGENT_DAY_KEYS + ['Talk Durations']]
+    bins = np.ceil(df['Talk Durations'].dt.total_seconds() / talk_histogram_resolution_seconds)
+    overflow_bin = talk_histogram_max_seconds // talk_histogram_resolution_seconds + 1
+    df = df.assign(Talk_Seconds=(np.minimum(bins, overflow_bin) * talk_histogram_resolution_seconds).astype('int16'))
+
+    amounts = df_kpi[AGENT_DAY_KPI_KEYS + ['Daily Received Amount']].astype({'Agent ID': str})
+    df = pd.merge(df.astype({'Agent ID': str}), amounts, on=AGENT_DAY_KPI_KEYS, how='left')
+    df['Recovered'] = (df['Daily Received Amount'].fillna(0) > 0).astype('int64')
+    histogram = df.groupby(AGENT_DAY_KEYS + ['Talk_Seconds'], observed=True).agg(
+        Calls=('Recovered', 'size'),
+        Recovered_Calls=('Recovered', 'sum')
+    ).reset_index()
+    histogram = histogram.astype({'Calls': 'int32', 'Recovered_Calls': 'int32'})
+    return apply_output_dtypes(histogram[AGENT_DAY_KEYS + TALK_HISTOGRAM_COLUMNS])
+
+
+def bytes_per_row(df):
+    """DataFrame 在記憶體中平均每列佔用的位元組數 (含字串內容)。"""
+    return df.memory_usage(deep=True).sum() / max(len(df), 1)
+
+
+def write_parquet_atomic(df, path):
+    """先寫入暫存檔再置換，避免儀表板讀到寫到一半的檔案。"""
+    df.to_parquet(f"{path}.tmp", index=False, compression='zstd')
+    os.replace(f"{path}.tmp", path)
+
+
+def save_final_report(df_calls, df_kpi=None):
+    """
+    儲存最終報告：通話事實表 (月分區 Parquet)、催員每日 KPI 維度表、催員每日指標表、
+    催員每分鐘撥打與通話時長直方圖，以及 (選擇性) 將兩表合併後的舊版 CSV。
+    """
+    if df_kpi is None:
+        df_kpi = build_agent_day_kpi(df_calls, None, None)
+    calls_typed = apply_output_dtypes(df_calls[[c for c in CALL_FACT_COLUMNS if c in df_calls.columns]])
+    calls_typed = calls_typed.sort_values(CALENDAR_SORT_KEYS, kind='stable', ignore_index=True)
+    kpi_typed = apply_output_dtypes(df_kpi)
+
+    written = write_month_partitions(calls_typed, output_dataset_directory, by_group=partition_by_group)
+    print(f"已寫入 {len(written)} 個 Parquet 分區至： {output_dataset_directory}")
+
+    write_parquet_atomic(kpi_typed, os.path.join(output_dataset_directory, agent_day_kpi_filename))
+    denormalized_bpr = bytes_per_row(pd.merge(calls_typed, kpi_typed, on=AGENT_DAY_KPI_KEYS, how='left'))
+    print(f"已寫入 KPI 維度表 ({len(kpi_typed)} 列)；通話表每列 {bytes_per_row(calls_typed):,.0f} bytes "
+          f"(合併 KPI 欄位時為 {denormalized_bpr:,.0f} bytes)。")
+
+    cube = build_agent_day_cube(calls_typed, kpi_typed).sort_values(CALENDAR_SORT_KEYS, kind='stable', ignore_index=True)
+    cube_path = os.path.join(output_dataset_directory, agent_day_cube_filename)
+    write_parquet_atomic(cube, cube_path)
+    print(f"已寫入催員每日指標表 ({len(cube)} 列)： {cube_path}")
+
+    histogram = build_agent_minute_histogram(calls_typed, kpi_typed).sort_values(CALENDAR_SORT_KEYS, kind='stable', ignore_index=True)
+    histogram_path = os.path.join(output_dataset_directory, agent_minute_histogram_filename)
+    write_parquet_atomic(histogram, histogram_path)
+    print(f"已寫入催員每分鐘撥打直方圖 ({len(histogram)} 列)： {histogram_path}")
+
+    talk_histogram = build_agent_talk_histogram(calls_typed, kpi_typed).sort_values(CALENDAR_SORT_KEYS, kind='stable', ignore_index=True)
+    talk_histogram_path = os.path.join(output_dataset_directory, agent_talk_histogram_filename)
+    write_parquet_atomic(talk_histogram, talk_histogram_path)
+    print(f"已寫入催員通話時長直方圖 ({len(talk_histogram)} 列)： {talk_histogram_path}")
+    if write_legacy_csv:
+        df_legacy = pd.merge(df_calls, df_kpi, on=AGENT_DAY_KPI_KEYS, how='left')
+        df_legacy.to_csv(output_path, index=False, encoding='utf-8-sig')
+        print(f"舊版 CSV 報告已儲存至： {output_path}")
+
+
 # --- 4. 主邏輯 (已升級) ---
 def main():
     """主執行函數"""
     print("--- 開始執行數據增強流程 ---")
+    manifest = load_manifest(manifest_path)
     
-    # 步驟一：處理前端通話紀錄
-    df_calls = process_call_logs(source_directory, group_file_path)
+    # 步驟一：處理前端通話紀錄 (僅解析新增或變更的檔案)
+    df_calls = process_call_logs(source_directory, group_file_path, manifest=manifest)
     if df_calls.empty:
         print("因無法處理通話紀錄，流程中止。")
+        save_manifest(manifest, manifest_path)
         return
 
     # 步驟二：建立日期到績效檔案路徑的映射表
@@ -234,77 +847,97 @@ def main():
 
     if not kpi_file_map:
         print("錯誤：找不到任何有效的每日績效檔案。將僅產出基礎通話報告。")
-        df_calls.to_csv(output_path, index=False, encoding='utf-8-sig')
-        print(f"報告已儲存至： {output_path}")
+        save_manifest(manifest, manifest_path)
+        save_final_report(df_calls)
         return
     print(f"成功映射 {len(kpi_file_map)} 個績效檔案。")
 
-    # 步驟三：逐日處理績效數據
+    # 步驟三：逐份處理績效底稿 (金額摘要 + 派件區間)，再以區間掃描計算在手案件數
     all_daily_amounts = []
     all_daily_cases = []
     
-    unique_report_dates = sorted(df_calls['Date'].unique())
+    unique_report_dates = sorted(pd.to_datetime(df_calls['Date'].unique()).date)
+    snapshot_plan = assign_snapshot_dates(unique_report_dates, set(kpi_file_map))
+    covered_by = {d: source for source, dates in snapshot_plan.items() for d in dates}
 
-    for report_date in unique_report_dates:
-        report_date_obj = pd.to_datetime(report_date).date()
-        
+    for report_date_obj in unique_report_dates:
         if report_date_obj in kpi_file_map:
-            daily_kpi_file = kpi_file_map[report_date_obj]
-            print(f"處理日期 {report_date_obj.strftime('%Y-%m-%d')} 的數據 (來源: {os.path.basename(daily_kpi_file)})...")
-            
-            df_amounts, df_cases = process_daily_kpi_file(daily_kpi_file, report_date)
-            
-            if not df_amounts.empty:
-                all_daily_amounts.append(df_amounts)
-            if not df_cases.empty:
-                all_daily_cases.append(df_cases)
+            continue
+        if report_date_obj in covered_by:
+            print(f"提示：日期 {report_date_obj.strftime('%Y-%m-%d')} 找不到對應的績效檔案，"
+                  f"在手案件數改以 {covered_by[report_date_obj].strftime('%Y-%m-%d')} 的底稿推算，回收金額留空。")
         else:
             print(f"警告：日期 {report_date_obj.strftime('%Y-%m-%d')} 找不到對應的績效檔案，將留空處理。")
 
+    reused_kpi_days = 0
+
+    for snapshot_date, covered_dates in sorted(snapshot_plan.items()):
+        daily_kpi_file = kpi_file_map[snapshot_date]
+        piece_key = snapshot_date.strftime('%Y%m%d')
+        try:
+            entry, is_changed = refresh_manifest_entry(manifest, daily_kpi_file)
+        except OSError as e:
+            # 無法讀取 (例如仍在 Excel 中開啟而被鎖定) 時與通話紀錄相同處理：略過此底稿，涵蓋的日期留空
+            print(f"處理檔案 {os.path.basename(daily_kpi_file)} 時發生錯誤: {e}")
+            continue
+
+        df_amounts = df_intervals = None
+        if not is_changed:
+            df_amounts = load_cached_piece('kpi_amounts', piece_key)
+            df_intervals = load_cached_piece('kpi_intervals', piece_key)
+
+        if df_amounts is None or df_intervals is None:
+            print(f"處理日期 {snapshot_date.strftime('%Y-%m-%d')} 的數據 (來源: {os.path.basename(daily_kpi_file)})...")
+            df_amounts, df_intervals = process_daily_kpi_file(daily_kpi_file, pd.Timestamp(snapshot_date), entry['hash'])
+            # 處理失敗時兩者皆為空表，不寫入中間檔並移除該檔的紀錄，下次執行會再嘗試
+            if not df_amounts.empty:
+                save_cached_piece(df_amounts, 'kpi_amounts', piece_key)
+                save_cached_piece(df_intervals, 'kpi_intervals', piece_key)
+                entry['rows'] = {'amounts': len(df_amounts), 'interval_events': len(df_intervals)}
+            else:
+                forget_manifest_entry(manifest, daily_kpi_file)
+        else:
+            reused_kpi_days += 1
+        
+        if not df_amounts.empty and snapshot_date in kpi_file_map and snapshot_date in covered_dates:
+            all_daily_amounts.append(df_amounts)
+        if not df_intervals.empty:
+            all_daily_cases.append(sweep_cases_on_hand(df_intervals, [pd.Timestamp(d) for d in covered_dates]))
+
+    print(f"績效數據：{reused_kpi_days} 份底稿沿用中間檔，其餘已重新計算。")
+    call_log_paths = glob.glob(os.path.join(source_directory, "Report_Outbound_CTD_*.xlsx"))
+    prune_manifest(manifest, call_log_paths + kpi_file_list)
+    save_manifest(manifest, manifest_path)
+
     # 步驟四：合併所有處理好的每日數據
     df_kpi_amounts_final = pd.concat(all_daily_amounts, ignore_index=True) if all_daily_amounts else pd.DataFrame()
     df_cases_on_hand_final = pd.concat(all_daily_cases, ignore_index=True) if all_daily_cases else pd.DataFrame()
+    for df_daily_kpi in (df_kpi_amounts_final, df_cases_on_hand_final):
+        if not df_daily_kpi.empty:
+            df_daily_kpi['Date'] = pd.to_datetime(df_daily_kpi['Date']).astype(df_calls['Date'].dtype)
 
-    # 步驟五：將匯總後的績效數據合併回主通話紀錄
-    print("正在合併最終數據...")
-    df_enriched = pd.merge(df_calls, df_kpi_amounts_final, on=['Date', 'Agent ID'], how='left')
-    if not df_cases_on_hand_final.empty:
-        df_enriched = pd.merge(df_enriched, df_cases_on_hand_final, on=['Date', 'Agent ID'], how='left')
-    
-    # 清理合併後可能產生的空值
-    new_kpi_cols = ['Daily Received Amount', 'Daily Assigned Amount', 'Target Amount', 'Cases on Hand']
-    for col in new_kpi_cols:
-        if col in df_enriched.columns:
-            df_enriched[col] = df_enriched[col].fillna(0)
-    
-    if 'Cases on Hand' in df_enriched.columns:
-        df_enriched['Cases on Hand'] = df_enriched['Cases on Hand'].astype(int)
-    
-    print("數據合併完成。")
+    # 步驟五：將績效數據整理為「催員 x 日」KPI 維度表，不再合併到每一筆通話
+    print("正在建立 KPI 維度表...")
+    df_agent_day_kpi = build_agent_day_kpi(df_calls, df_kpi_amounts_final, df_cases_on_hand_final)
+    print("數據整理完成。")
 
     # 步驟六：篩選必要欄位並儲存最終報告
     try:
-        print("正在篩選最終報告的欄位，只保留儀表板需要的資訊...")
-        
-        used_cols = [
-            'Date', 'Group', 'Agent ID', 'Agent Name', 'Case No', 'Connected', 
-            'Talk Durations', 'Call Assigned', 'Cases on Hand', 'Daily Received Amount'
-        ]
-        
-        final_cols_to_keep = [col for col in used_cols if col in df_enriched.columns]
-        
-        if len(final_cols_to_keep) != len(used_cols):
+        print("正在篩選通話事實表的欄位，只保留儀表板需要的資訊...")
+
+        final_cols_to_keep = [col for col in CALL_FACT_COLUMNS if col in df_calls.columns]
+
+        if len(final_cols_to_keep) != len(CALL_FACT_COLUMNS):
             print("警告：部分儀表板必要的欄位在資料中找不到，可能影響儀表板功能。")
-            print(f"預期欄位: {used_cols}")
+            print(f"預期欄位: {CALL_FACT_COLUMNS}")
             print(f"實際找到的欄位: {final_cols_to_keep}")
 
-        df_final_filtered = df_enriched[final_cols_to_keep]
-        
-        print(f"欄位篩選完成，報告將從 {len(df_enriched.columns)} 個欄位減為 {len(df_final_filtered.columns)} 個。")
+        df_final_filtered = df_calls[final_cols_to_keep]
+
+        print(f"欄位篩選完成，通話表從 {len(df_calls.columns)} 個欄位減為 {len(df_final_filtered.columns)} 個。")
 
-        df_final_filtered.to_csv(output_path, index=False, encoding='utf-8-sig')
+        save_final_report(df_final_filtered, df_agent_day_kpi)
         print(f"--- 流程成功結束 ---")
-        print(f"增強版報告已成功儲存至： {output_path}")
     except Exception as e:
         print(f"儲存最終報告時發生錯誤: {e}")
         traceback.print_exc()